@@ -0,0 +1,327 @@
+"""Multi-snake arena.
+
+Many snakes and many food items share one board. Every cell of the board
+is one slot in a flat ``grid`` array holding the id of the snake on it,
+``FOOD`` or ``EMPTY``. A move checks only its target cell, so head-to-body
+collisions and eating are a single lookup. Head-to-head collisions are
+found by counting the new heads per target cell. A tick therefore costs
+one head push and one tail pop per live snake, whatever the snakes'
+lengths. A dying snake is cleared once, and part of its body turns into
+food.
+
+The arena runs headless. ``python arena.py`` plays a bot tournament:
+
+    python arena.py --snakes 100 --size 200x200 --games 5 --bots greedy,random
+"""
+import argparse
+import random
+import sys
+import time
+from array import array
+from collections import deque
+
+from engine import DIRECTIONS, NORMAL_GROWTH, NORMAL_POINTS, is_reverse, parse_size
+
+EMPTY = -1
+FOOD = -2
+START_LENGTH = 3
+DEATH_FOOD_STRIDE = 3  # every third cell of a dead snake becomes food
+SPAWN_TRIES = 64
+
+
+class ArenaSnake:
+    __slots__ = ("id", "name", "cells", "direction", "grow_pending", "score", "kills",
+                 "alive", "died_at", "killed_by", "target")
+
+    def __init__(self, snake_id, name, head, direction):
+        self.id = snake_id
+        self.name = name
+        self.cells = deque([head])  # head on the left
+        self.direction = direction
+        self.grow_pending = START_LENGTH - 1
+        self.score = 0
+        self.kills = 0
+        self.alive = True
+        self.died_at = None
+        self.killed_by = None
+        self.target = None  # food cell a bot is heading for
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    @property
+    def head(self):
+        return self.cells[0]
+
+    @property
+    def tail(self):
+        return self.cells[-1]
+
+
+class ArenaEngine:
+    def __init__(self, cols=80, rows=60, snakes=8, food=None, seed=None, names=None):
+        self.cols = cols
+        self.rows = rows
+        self.snake_count = snakes
+        self.food_target = snakes * 2 if food is None else food
+        self.names = names
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.grid = array("i", [EMPTY]) * (self.cols * self.rows)
+        self.food = set()
+        self.ticks = 0
+        self.eaten = []  # (snake id, cell) eaten on the last step
+        self.died = []  # snakes that died on the last step
+        self.food_added = []  # cells that became food on the last step
+        self.snakes = []
+        for i in range(self.snake_count):
+            name = self.names[i] if self.names else f"snake{i}"
+            head, direction = self._spawn_point()
+            snake = ArenaSnake(i, name, head, direction)
+            self.grid[head[1] * self.cols + head[0]] = i
+            self.snakes.append(snake)
+        self.alive = list(self.snakes)
+        self._top_up_food()
+        return self
+
+    def _spawn_point(self):
+        # A free cell with room to move for a few ticks before the wall or another snake
+        cols, rows, grid = self.cols, self.rows, self.grid
+        for _ in range(SPAWN_TRIES * 4):
+            col, row = self.rng.randrange(cols), self.rng.randrange(rows)
+            direction = self.rng.choice(DIRECTIONS)
+            clear = True
+            for k in range(START_LENGTH + 2):
+                c, r = col + direction[0] * k, row + direction[1] * k
+                if not (0 <= c < cols and 0 <= r < rows) or grid[r * cols + c] != EMPTY:
+                    clear = False
+                    break
+            if clear:
+                return (col, row), direction
+        raise ValueError(f"no room for {self.snake_count} snakes on a {cols}x{rows} board")
+
+    def _top_up_food(self):
+        cols, size, grid, rng = self.cols, self.cols * self.rows, self.grid, self.rng
+        tries = 0
+        while len(self.food) < self.food_target and tries < SPAWN_TRIES:
+            tries += 1
+            index = rng.randrange(size)
+            if grid[index] == EMPTY:
+                grid[index] = FOOD
+                cell = (index % cols, index // cols)
+                self.food.add(cell)
+                self.food_added.append(cell)
+
+    def turn(self, snake_id, direction):
+        snake = self.snakes[snake_id]
+        if is_reverse(direction, snake.direction):
+            return False
+        snake.direction = direction
+        return True
+
+    @property
+    def finished(self):
+        return len(self.alive) <= (1 if self.snake_count > 1 else 0)
+
+    def step(self, actions=None):
+        """Move every live snake one cell.
+
+        ``actions`` maps snake id to a direction (a dict, or a list with
+        ``None`` for "keep going"). Reversals are ignored. Afterwards,
+        ``eaten``, ``died`` and ``food_added`` describe what happened.
+        """
+        cols, rows, grid, snakes = self.cols, self.rows, self.grid, self.snakes
+        self.ticks += 1
+        eaten = self.eaten = []
+        died = self.died = []
+        self.food_added = []
+
+        # Resolve every head against the board as it was before this tick
+        moves = []
+        targets = {}
+        for snake in self.alive:
+            if actions is not None:
+                direction = actions[snake.id] if not isinstance(actions, dict) \
+                    else actions.get(snake.id)
+                if direction is not None and not is_reverse(direction, snake.direction):
+                    snake.direction = direction
+            head = snake.cells[0]
+            col, row = head[0] + snake.direction[0], head[1] + snake.direction[1]
+            if not (0 <= col < cols and 0 <= row < rows):
+                died.append(snake)
+                continue
+            index = row * cols + col
+            owner = grid[index]
+            if owner >= 0:
+                # Tails have not moved yet, so running into one is a collision too
+                if owner != snake.id:
+                    snakes[owner].kills += 1
+                    snake.killed_by = owner
+                died.append(snake)
+                continue
+            moves.append((snake, (col, row), index))
+            targets[index] = targets.get(index, 0) + 1
+
+        for snake, cell, index in moves:
+            if targets[index] > 1:
+                died.append(snake)  # head-on with another snake
+                continue
+            if grid[index] == FOOD:
+                self.food.discard(cell)
+                snake.score += NORMAL_POINTS
+                snake.grow_pending += NORMAL_GROWTH
+                eaten.append((snake.id, cell))
+            snake.cells.appendleft(cell)
+            grid[index] = snake.id
+            if snake.grow_pending > 0:
+                snake.grow_pending -= 1
+            else:
+                tail = snake.cells.pop()
+                grid[tail[1] * cols + tail[0]] = EMPTY
+
+        for snake in died:
+            snake.alive = False
+            snake.died_at = self.ticks
+            for i, cell in enumerate(snake.cells):
+                index = cell[1] * cols + cell[0]
+                if i % DEATH_FOOD_STRIDE == 0:
+                    grid[index] = FOOD
+                    self.food.add(cell)
+                    self.food_added.append(cell)
+                else:
+                    grid[index] = EMPTY
+        if died:
+            self.alive = [snake for snake in self.alive if snake.alive]
+
+        self._top_up_food()
+        return died
+
+    def owner(self, cell):
+        return self.grid[cell[1] * self.cols + cell[0]]
+
+    def is_safe(self, cell):
+        col, row = cell
+        return 0 <= col < self.cols and 0 <= row < self.rows and self.grid[row * self.cols + col] < 0
+
+    def cells_in(self, left, top, right, bottom):
+        # (snake id or FOOD, cell) for every non-empty cell in the rectangle
+        cols, grid = self.cols, self.grid
+        for row in range(max(0, top), min(self.rows, bottom)):
+            base = row * cols
+            for col in range(max(0, left), min(cols, right)):
+                value = grid[base + col]
+                if value != EMPTY:
+                    yield value, (col, row)
+
+
+def random_bot(arena, snake, rng):
+    # Any move that does not die right away
+    moves = [d for d in DIRECTIONS if not is_reverse(d, snake.direction)
+             and arena.is_safe((snake.head[0] + d[0], snake.head[1] + d[1]))]
+    return rng.choice(moves) if moves else None
+
+
+def greedy_bot(arena, snake, rng):
+    # Safe move that gets closest to the food it picked; the nearest food is
+    # looked up again only once that one is gone, not on every tick
+    head = snake.head
+    target = snake.target
+    if target is None or arena.owner(target) != FOOD:
+        if not arena.food:
+            return random_bot(arena, snake, rng)
+        target = snake.target = min(arena.food,
+                                    key=lambda f: abs(f[0] - head[0]) + abs(f[1] - head[1]))
+    best, best_distance = None, None
+    for d in DIRECTIONS:
+        if is_reverse(d, snake.direction):
+            continue
+        cell = (head[0] + d[0], head[1] + d[1])
+        if not arena.is_safe(cell):
+            continue
+        distance = abs(target[0] - cell[0]) + abs(target[1] - cell[1]) + rng.random() * 0.5
+        if best_distance is None or distance < best_distance:
+            best, best_distance = d, distance
+    return best
+
+
+BOTS = {
+    "random": random_bot,
+    "greedy": greedy_bot,
+}
+
+
+def run_game(arena, bots, rng, max_ticks):
+    # bots[i] steers snake i; returns the number of ticks played
+    while not arena.finished and arena.ticks < max_ticks:
+        actions = [None] * len(arena.snakes)
+        for snake in arena.alive:
+            actions[snake.id] = bots[snake.id](arena, snake, rng)
+        arena.step(actions)
+    return arena.ticks
+
+
+def run_tournament(bot_names, games=10, seed=0, cols=80, rows=60, food=None, max_ticks=5000):
+    """Play ``games`` arena games and aggregate per-bot results."""
+    rng = random.Random(seed)
+    bots = [BOTS[name] for name in bot_names]
+    stats = {name: {"snakes": 0, "wins": 0, "length": 0, "kills": 0, "score": 0}
+             for name in bot_names}
+    ticks = 0
+    start = time.perf_counter()
+    arena = ArenaEngine(cols, rows, len(bot_names), food=food, seed=seed, names=bot_names)
+    for game in range(games):
+        arena.reset(seed + game)
+        ticks += run_game(arena, bots, rng, max_ticks)
+        # Last snake standing wins; on a timeout the longest survivor does
+        winner = max(arena.alive, key=len, default=None)
+        for snake in arena.snakes:
+            row = stats[snake.name]
+            row["snakes"] += 1
+            row["length"] += len(snake)
+            row["kills"] += snake.kills
+            row["score"] += snake.score
+            if snake is winner:
+                row["wins"] += 1
+    elapsed = time.perf_counter() - start
+    return stats, ticks, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless multi-snake bot tournament")
+    parser.add_argument("--snakes", type=int, default=20)
+    parser.add_argument("--size", type=parse_size, default=(80, 60), metavar="COLSxROWS")
+    parser.add_argument("--food", type=int, help="food kept on the board (default 2 per snake)")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--bots", default="greedy,random",
+                        help=f"comma-separated bots assigned round-robin ({', '.join(BOTS)})")
+    parser.add_argument("--max-ticks", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    kinds = args.bots.split(",")
+    unknown = [name for name in kinds if name not in BOTS]
+    if unknown:
+        parser.error(f"unknown bot {unknown[0]!r}")
+    names = [kinds[i % len(kinds)] for i in range(args.snakes)]
+    cols, rows = args.size
+    stats, ticks, elapsed = run_tournament(names, args.games, args.seed, cols, rows,
+                                           args.food, args.max_ticks)
+
+    print(f"{'bot':<10}{'snakes':>8}{'wins':>6}{'avg len':>9}{'kills':>7}{'avg score':>11}")
+    for name, row in stats.items():
+        n = row["snakes"]
+        print(f"{name:<10}{n:>8}{row['wins']:>6}{row['length'] / n:>9.1f}{row['kills']:>7}"
+              f"{row['score'] / n:>11.1f}")
+    print(f"{ticks} ticks in {elapsed:.2f}s ({ticks / elapsed:,.0f} ticks/s, "
+          f"{args.snakes} snakes on {cols}x{rows})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""Sound effects played off the game thread.
+
+Effects are synthesized once into an in-memory bank when the mixer comes
+up, so there are no asset files to decode. The game only calls ``play``,
+which drops a request into a bounded queue and returns. A worker thread
+owns the mixer: it starts the mixer (device probing can block for a while
+on headless machines), builds the bank, then assigns queued requests to a
+fixed pool of channels. When every channel is busy, it stops the oldest
+voice of the lowest priority. A request only takes a voice whose priority
+is equal or lower.
+"""
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+import pygame
+
+VOICES = 8
+QUEUE_SIZE = 32
+ATTACK = 0.004  # seconds of fade-in, avoids clicks
+RELEASE = 0.015  # seconds of fade-out
+CLOSE_TIMEOUT = 1.0  # seconds close() waits for the audio thread; it is a daemon, so exit is not held up
+
+# name -> (priority, volume, segments); a segment is (waveform, start Hz, end Hz, seconds)
+SOUNDS = {
+    "eat": (1, 0.35, (("square", 660, 990, 0.06),)),
+    "special": (2, 0.4, (("square", 880, 1320, 0.05), ("square", 1320, 1760, 0.08))),
+    "level_up": (3, 0.45, tuple(("square", hz, hz, 0.08) for hz in (523, 659, 784, 1047))),
+    "game_over": (4, 0.5, (("sine", 440, 110, 0.6),)),
+    "won": (4, 0.5, tuple(("sine", hz, hz, 0.12) for hz in (523, 659, 784, 1047, 1319))),
+}
+
+
+def synthesize(segments, rate):
+    """Render segments into one float wave in [-1, 1]."""
+    parts = []
+    phase = 0.0
+    for waveform, start_hz, end_hz, seconds in segments:
+        n = max(1, int(rate * seconds))
+        # Integrate the frequency sweep so segments join without phase jumps
+        phases = phase + 2 * np.pi * np.cumsum(np.linspace(start_hz, end_hz, n)) / rate
+        phase = phases[-1]
+        wave = np.sin(phases)
+        if waveform == "square":
+            wave = np.sign(wave) * 0.6
+        envelope = np.ones(n)
+        attack = min(n, int(rate * ATTACK))
+        release = min(n, int(rate * RELEASE))
+        envelope[:attack] = np.linspace(0, 1, attack)
+        envelope[n - release:] *= np.linspace(1, 0, release)
+        parts.append(wave * envelope)
+    return np.concatenate(parts)
+
+
+def to_mixer_format(wave, size, channels):
+    # Match the sample layout the mixer was opened with, as make_sound expects
+    if size == 32:
+        samples = wave.astype(np.float32)
+    elif abs(size) == 16:
+        samples = (wave * 32767).astype(np.int16)
+        if size > 0:
+            samples = (samples.astype(np.int32) + 32768).astype(np.uint16)
+    else:
+        samples = (wave * 127).astype(np.int8)
+        if size > 0:
+            samples = (samples.astype(np.int16) + 128).astype(np.uint8)
+    if channels > 1:
+        samples = np.repeat(samples[:, None], channels, axis=1)
+    return np.ascontiguousarray(samples)
+
+
+def build_bank():
+    rate, size, channels = pygame.mixer.get_init()
+    bank = {}
+    for name, (_, volume, segments) in SOUNDS.items():
+        sound = pygame.sndarray.make_sound(to_mixer_format(synthesize(segments, rate), size, channels))
+        sound.set_volume(volume)
+        bank[name] = sound
+    return bank
+
+
+class AudioPlayer:
+    def __init__(self, voices=VOICES, queue_size=QUEUE_SIZE, on_ready=None):
+        self.voices = voices
+        self.on_ready = on_ready
+        self.bank = {}
+        self.ready = threading.Event()
+        self.played = 0
+        self.stolen = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self._channels = []
+        self._voice_info = []  # (priority, start time) per channel
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="audio", daemon=True)
+            self._thread.start()
+
+    def play(self, name):
+        # Called from the game thread: never blocks, drops the request if audio is behind
+        if not self.ready.is_set():
+            return
+        try:
+            self._queue.put_nowait(name)
+        except queue.Full:
+            self.dropped += 1
+
+    def _open(self):
+        try:
+            pygame.mixer.init()
+            pygame.mixer.set_num_channels(self.voices)
+            self.bank = build_bank()
+        except pygame.error as e:
+            print(f"Audio disabled: {e}", file=sys.stderr)
+            return False
+        self._channels = [pygame.mixer.Channel(i) for i in range(self.voices)]
+        self._voice_info = [(0, 0.0)] * self.voices
+        return True
+
+    def _run(self):
+        if not self._open():
+            return
+        self.ready.set()
+        if self.on_ready is not None:
+            self.on_ready()
+        while not self._stop.is_set():
+            try:
+                name = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self._dispatch(name)
+
+    def _dispatch(self, name):
+        sound = self.bank.get(name)
+        if sound is None:
+            return
+        priority = SOUNDS[name][0]
+        index = self._claim_channel(priority)
+        if index is None:
+            self.dropped += 1
+            return
+        self._channels[index].play(sound)
+        self._voice_info[index] = (priority, time.monotonic())
+        self.played += 1
+
+    def _claim_channel(self, priority):
+        for i, channel in enumerate(self._channels):
+            if not channel.get_busy():
+                return i
+        # Steal the oldest voice of the lowest priority, unless it outranks this sound
+        victim = min(range(len(self._channels)), key=self._voice_info.__getitem__)
+        if self._voice_info[victim][0] > priority:
+            return None
+        self._channels[victim].stop()
+        self.stolen += 1
+        return victim
+
+    def wait_ready(self, timeout=None):
+        return self.ready.wait(timeout)
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=CLOSE_TIMEOUT)
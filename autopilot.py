@@ -0,0 +1,253 @@
+"""Autopilot for the single-board game.
+
+Moves are planned on a Hamiltonian cycle: a closed path through every cell
+of the board. The snake's body always lies along the cycle from tail to
+head, so the stretch of cycle from the head round to the tail is free. A
+move is safe when it lands in that stretch and still leaves room behind it
+for the body's length and pending growth, so the cells it skips can be
+filled in later. That cycle-distance comparison is the tail-reachability
+check, and it costs a few array lookups. Moves that skip ahead along the
+cycle are shortcuts. Among the safe ones, the one nearest the food by BFS
+distance wins, and the move never jumps past the food. Once the snake covers
+half the board it stops taking shortcuts, and boards under
+``SHORTCUT_MIN_CELLS`` cells never take them. Following the cycle then fills
+the board. A snake off the cycle (a new one facing against it) takes the
+free cell least far along the cycle until it rejoins.
+
+The BFS distance field grows outward from the food one level at a time,
+and only as far as the moves being ranked need. Each decision may add only
+``FIELD_BUDGET`` cells to it. A cell the field has not reached yet is at
+least one level further than the deepest level so far, and that lower
+bound still ranks it correctly against the cells already reached. The
+field is kept between ticks and restarted only when the food moves. So most
+decisions reuse the field as it is, and the rest extend it by a few levels.
+
+``python autopilot.py`` plays headless games and reports wins and decision times:
+
+    python autopilot.py --games 20 --size 40x30
+    python autopilot.py --check     # seeded games on several sizes; exits 1 unless all are won
+"""
+import argparse
+import random
+import sys
+import time
+from array import array
+from functools import lru_cache
+
+from board import DENSE_MAX_CELLS
+from engine import (BOARD_COLS, BOARD_ROWS, DIRECTIONS, SPECIAL_GROWTH, SnakeEngine, StepResult,
+                    is_reverse, parse_size)
+
+SHORTCUT_LIMIT = 0.5  # share of the board the snake may cover and still take shortcuts
+SHORTCUT_MIN_CELLS = 36  # smaller boards only follow the cycle; skipped cells would strand them
+GROWTH_MARGIN = SPECIAL_GROWTH + 1  # free cycle cells a shortcut keeps beyond its length and growth
+CYCLE_MAX_CELLS = DENSE_MAX_CELLS  # the cycle is stored per cell, so huge worlds are refused
+FIELD_MAX_CELLS = 1 << 16  # larger boards rank shortcuts by Manhattan distance instead
+FIELD_BUDGET = 256  # most cells one decision may add to the distance field
+UNREACHED = 1 << 30
+CHECK_SIZES = ((4, 4), (6, 6), (8, 8), (10, 10), (12, 9), (40, 30))
+
+
+@lru_cache(maxsize=8)
+def hamiltonian_cycle(cols, rows):
+    """Position along a Hamiltonian cycle of every flat cell index.
+
+    The cycle runs along the top row, zigzags back through the other rows
+    (leaving column 0 free) and returns up column 0. That needs an even
+    number of rows; boards with odd rows and even columns use the
+    transposed cycle. Boards where both sides are odd have no cycle.
+    Boards over ``CYCLE_MAX_CELLS`` cells are refused.
+    """
+    if cols < 2 or rows < 2 or (cols % 2 and rows % 2):
+        raise ValueError(f"no Hamiltonian cycle on a {cols}x{rows} board "
+                         "(needs an even side and both sides at least 2)")
+    if cols * rows > CYCLE_MAX_CELLS:
+        raise ValueError(f"a {cols}x{rows} board is too large for the autopilot "
+                         f"(at most {CYCLE_MAX_CELLS} cells)")
+    transpose = rows % 2 == 1
+    width, height = (rows, cols) if transpose else (cols, rows)
+    path = [(x, 0) for x in range(width)]
+    for y in range(1, height):
+        xs = range(width - 1, 0, -1) if y % 2 else range(1, width)
+        path.extend((x, y) for x in xs)
+    path.extend((0, y) for y in range(height - 1, 0, -1))
+    order = array("i", [0]) * (cols * rows)
+    for position, (x, y) in enumerate(path):
+        col, row = (y, x) if transpose else (x, y)
+        order[row * cols + col] = position
+    return order
+
+
+class Autopilot:
+    """Chooses each move of a ``SnakeEngine`` on a ``cols`` x ``rows`` board."""
+
+    def __init__(self, cols=BOARD_COLS, rows=BOARD_ROWS):
+        self.cols = cols
+        self.rows = rows
+        self.size = cols * rows
+        self.order = hamiltonian_cycle(cols, rows)
+        self.field = array("i", [UNREACHED]) * self.size if self.size <= FIELD_MAX_CELLS else None
+        self.field_food = None
+        self.frontier = []
+        self.depth = 0
+        self.grid = None
+        self.budget = 0
+
+    def decide(self, engine):
+        """Direction for the engine's next move, or None when every move is fatal."""
+        cols, rows, order, size = self.cols, self.rows, self.order, self.size
+        body = engine.snake
+        head, tail = body.head, body.tail
+        here = order[head[1] * cols + head[0]]
+        # Cycle steps from the head to the tail; everything strictly between is free
+        gap = (order[tail[1] * cols + tail[0]] - here) % size or size
+        food = engine.food
+
+        room = 0
+        if food is not None and size >= SHORTCUT_MIN_CELLS and len(body) < size * SHORTCUT_LIMIT:
+            room = gap - 1 - engine.grow_pending - GROWTH_MARGIN - len(body)
+            food_ahead = (order[food[1] * cols + food[0]] - here) % size
+            if food_ahead < gap:
+                room = min(room, food_ahead)
+            if self.field is not None:
+                self.grid = body.grid
+                self.budget = FIELD_BUDGET
+                if food != self.field_food:
+                    self._restart_field(food)
+
+        best, best_key, follow, fallback, fallback_ahead = None, None, None, None, None
+        for direction in DIRECTIONS:
+            if is_reverse(direction, engine.direction):
+                continue
+            col, row = head[0] + direction[0], head[1] + direction[1]
+            if not (0 <= col < cols and 0 <= row < rows):
+                continue
+            index = row * cols + col
+            ahead = (order[index] - here) % size
+            if ahead < gap:
+                if ahead == 1:
+                    follow = direction
+                if ahead <= room:
+                    if self.field is not None:
+                        distance = self._distance(index)
+                    else:
+                        distance = abs(food[0] - col) + abs(food[1] - row)
+                    # Nearest to the food, then the longest jump along the cycle
+                    key = (distance, -ahead)
+                    if best_key is None or key < best_key:
+                        best, best_key = direction, key
+            if (fallback_ahead is None or ahead < fallback_ahead) and not body.occupied((col, row)):
+                fallback, fallback_ahead = direction, ahead
+        # Otherwise the free cell least far along the cycle: a snake facing against the
+        # cycle (or boxed in) rejoins it as soon as it can, and any free cell buys a tick
+        return best or follow or fallback
+
+    def _restart_field(self, food):
+        start = food[1] * self.cols + food[0]
+        self.field = array("i", [UNREACHED]) * self.size
+        self.field[start] = 0
+        self.field_food = food
+        self.frontier = [start]
+        self.depth = 0
+
+    def _distance(self, index):
+        # BFS distance from the food, growing the field a level at a time until it covers index
+        field = self.field
+        while field[index] == UNREACHED and self.frontier:
+            if self.budget <= 0:
+                return self.depth + 1  # not reached yet, so at least one level further
+            self._expand()
+        return field[index]
+
+    def _expand(self):
+        cols, size, field, grid = self.cols, self.size, self.field, self.grid
+        depth = self.depth = self.depth + 1
+        frontier = []
+        for i in self.frontier:
+            col = i % cols
+            for j in (i - cols, i + cols, i - 1 if col else -1, i + 1 if col + 1 < cols else -1):
+                if 0 <= j < size and field[j] == UNREACHED and not grid[j]:
+                    field[j] = depth
+                    frontier.append(j)
+        self.frontier = frontier
+        self.budget -= len(frontier)
+
+
+def play(engine, autopilot, max_ticks, timings=None):
+    # One autopilot game to the end; appends each decision's seconds to timings
+    result = StepResult.MOVED
+    while result not in (StepResult.DIED, StepResult.WON) and engine.ticks < max_ticks:
+        start = time.perf_counter()
+        direction = autopilot.decide(engine)
+        if timings is not None:
+            timings.append(time.perf_counter() - start)
+        result = engine.step(direction)
+    return result
+
+
+def play_games(cols, rows, games, seed, max_ticks, timings=None):
+    # (seeds of the games lost, total length, total ticks) for seeded games on one board
+    autopilot = Autopilot(cols, rows)
+    engine = SnakeEngine(cols, rows)
+    rng = random.Random(seed)
+    lost = []
+    length = ticks = 0
+    for _ in range(games):
+        game_seed = rng.getrandbits(32)
+        engine.reset(game_seed)
+        if play(engine, autopilot, max_ticks, timings) != StepResult.WON:
+            lost.append(game_seed)
+        length += len(engine.snake)
+        ticks += engine.ticks
+    return lost, length, ticks
+
+
+def check(games, seed, max_ticks):
+    # Every seeded game on every CHECK_SIZES board must be won
+    failed = False
+    for cols, rows in CHECK_SIZES:
+        lost, _, _ = play_games(cols, rows, games, seed, max_ticks)
+        print(f"{cols}x{rows}: {games - len(lost)}/{games} boards cleared")
+        for game_seed in lost:
+            print(f"  lost game with seed {game_seed}")
+        failed = failed or bool(lost)
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless autopilot games")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--size", type=parse_size, default=(BOARD_COLS, BOARD_ROWS),
+                        metavar="COLSxROWS")
+    parser.add_argument("--max-ticks", type=int, default=2_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check", action="store_true",
+                        help="play --games seeded games on several board sizes and "
+                             "exit with status 1 unless every one is won")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        return check(args.games, args.seed, args.max_ticks)
+
+    cols, rows = args.size
+    try:
+        Autopilot(cols, rows)
+    except ValueError as e:
+        parser.error(str(e))
+    timings = array("d")
+    start = time.perf_counter()
+    lost, length, ticks = play_games(cols, rows, args.games, args.seed, args.max_ticks, timings)
+    elapsed = time.perf_counter() - start
+
+    timings = sorted(timings)
+    n = len(timings)
+    print(f"{args.games - len(lost)}/{args.games} boards cleared on {cols}x{rows}, "
+          f"average length {length / args.games:.0f} of {cols * rows}")
+    print(f"{ticks} moves in {elapsed:.2f}s ({ticks / elapsed:,.0f} moves/s)")
+    print(f"decision us: mean {sum(timings) / n * 1e6:.1f}  p50 {timings[n // 2] * 1e6:.1f}  "
+          f"p99 {timings[n * 99 // 100] * 1e6:.1f}  max {timings[-1] * 1e6:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
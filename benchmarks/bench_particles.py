@@ -0,0 +1,86 @@
+"""Particle update cost: NumPy ParticleSystem vs the old dataclass list.
+
+Each round keeps the pool topped up with fresh bursts so the live count
+stays near the target while particles expire and get compacted.
+
+    python benchmarks/bench_particles.py
+"""
+import math
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from particles import ParticleSystem  # noqa: E402
+
+FRAMES = 200
+BURST = 30
+
+
+@dataclass
+class Particle:
+    x: float
+    y: float
+    dx: float
+    dy: float
+    life: float
+    max_life: float
+    color: tuple
+    size: float
+
+
+def list_burst(particles, count):
+    for _ in range(count):
+        angle = random.uniform(0, 2 * math.pi)
+        speed = random.uniform(3, 12)
+        particles.append(Particle(400, 300, math.cos(angle) * speed, math.sin(angle) * speed,
+                                  120, 120, (255, 69, 58), random.uniform(3, 8)))
+
+
+def list_update(particles):
+    for particle in particles[:]:
+        particle.x += particle.dx
+        particle.y += particle.dy
+        particle.life -= 1
+        particle.dy += 0.1
+        if particle.life <= 0:
+            particles.remove(particle)
+
+
+def time_system(live):
+    system = ParticleSystem(capacity=live, seed=0)
+    refill = live // 120 + BURST
+    while len(system) < live:
+        system.burst(400, 300, (255, 69, 58), BURST, (3, 12), 120, (3, 8))
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        system.update()
+        system.burst(400, 300, (255, 69, 58), refill, (3, 12), 120, (3, 8))
+    return (time.perf_counter() - start) / FRAMES, len(system)
+
+
+def time_list(live):
+    particles = []
+    refill = live // 120 + BURST
+    list_burst(particles, live)
+    frames = max(5, FRAMES * 1000 // live)  # the list version gets slow quickly
+    start = time.perf_counter()
+    for _ in range(frames):
+        list_update(particles)
+        list_burst(particles, refill)
+    return (time.perf_counter() - start) / frames
+
+
+def main():
+    print(f"{'target':>8} {'live':>8} {'numpy ms':>10} {'list ms':>10}")
+    for live in (1000, 10000, 50000):
+        numpy_s, count = time_system(live)
+        list_s = time_list(live) if live <= 10000 else float("nan")
+        print(f"{live:>8} {count:>8} {numpy_s * 1e3:>10.3f} {list_s * 1e3:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
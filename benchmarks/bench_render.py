@@ -0,0 +1,60 @@
+"""draw_game frame time with and without the sprite cache.
+
+Runs against the SDL dummy video driver, so no display is needed.
+
+    python benchmarks/bench_render.py
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_tick import cycle_cells  # noqa: E402
+from board import SnakeBody  # noqa: E402
+from main import CELL_SIZE, Colors, SnakeGame  # noqa: E402
+from render_cache import SpriteCache  # noqa: E402
+
+FRAMES = 200
+PARTICLE_BURSTS = 10  # 15 particles each
+
+
+def setup_game(length):
+    game = SnakeGame()
+    game.start_new_game()
+    engine = game.engine
+    cycle = cycle_cells(engine.cols, engine.rows)
+    engine.snake = SnakeBody(engine.cols, engine.rows, cycle[0])
+    for cell in cycle[1:length]:
+        engine.snake.push_head(cell)
+    for i, (col, row) in enumerate(list(engine.snake)[:20]):
+        game.trail_positions.append((col * CELL_SIZE, row * CELL_SIZE, 20 - i))
+    for _ in range(PARTICLE_BURSTS):
+        game.create_explosion_particles(400, 300, Colors.NEON_GREEN)
+    return game
+
+
+def time_frames(game):
+    game.draw_game()  # warm up
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        game.food_pulse += 0.2
+        game.draw_game()
+    return (time.perf_counter() - start) / FRAMES
+
+
+def main():
+    print(f"{'length':>8} {'cached ms':>10} {'uncached ms':>12} {'speedup':>8}")
+    for length in (10, 100, 500):
+        game = setup_game(length)
+        cached = time_frames(game)
+        game.sprite_cache = SpriteCache(max_size=0)
+        uncached = time_frames(game)
+        print(f"{length:>8} {cached * 1e3:>10.3f} {uncached * 1e3:>12.3f} "
+              f"{uncached / cached:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
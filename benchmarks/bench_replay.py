@@ -0,0 +1,46 @@
+"""Headless replay validation throughput.
+
+Records a long seeded game by steering along a Hamiltonian cycle (the
+snake eats its way up the board without dying), then times how fast
+replay.verify re-simulates it.
+
+    python benchmarks/bench_replay.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_tick import cycle_cells  # noqa: E402
+from engine import BOARD_COLS, BOARD_ROWS, SnakeEngine  # noqa: E402
+from replay import Replay, verify  # noqa: E402
+
+TICKS = 200000
+
+
+def record_game(ticks, seed=1234):
+    cycle = cycle_cells(BOARD_COLS, BOARD_ROWS)
+    position = {cell: i for i, cell in enumerate(cycle)}
+    engine = SnakeEngine(BOARD_COLS, BOARD_ROWS, seed=seed)
+    while engine.ticks < ticks and engine.alive:
+        head = engine.head
+        nxt = cycle[(position[head] + 1) % len(cycle)]
+        engine.direction = (nxt[0] - head[0], nxt[1] - head[1])
+        engine.step()
+    return Replay.from_engine(engine)
+
+
+def main():
+    replay = record_game(TICKS)
+    data = replay.to_bytes()
+    start = time.perf_counter()
+    ok = verify(Replay.from_bytes(data))
+    elapsed = time.perf_counter() - start
+    print(f"ticks={replay.ticks} score={replay.score} turns={len(replay.turns)} "
+          f"bytes={len(data)} valid={ok}")
+    print(f"{replay.ticks / elapsed:,.0f} ticks/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Per-tick cost of SnakeEngine.step against snake length.
+
+The snake follows a Hamiltonian cycle so it never collides, which lets the
+length go all the way up to a full board. The old list-based tick is timed
+alongside for comparison.
+
+    python benchmarks/bench_tick.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from board import SnakeBody  # noqa: E402
+from engine import BOARD_COLS, BOARD_ROWS, SnakeEngine  # noqa: E402
+
+TICKS = 20000
+
+
+def cycle_cells(cols, rows):
+    # Cells in order along a serpentine over columns 1.., returning up column 0 (needs an
+    # even row count); autopilot.hamiltonian_cycle maps cells to positions instead
+    path = []
+    for row in range(rows):
+        span = range(1, cols) if row % 2 == 0 else range(cols - 1, 0, -1)
+        path.extend((col, row) for col in span)
+    path.extend((0, row) for row in range(rows - 1, -1, -1))
+    return path
+
+
+def engine_on_cycle(cycle, length):
+    engine = SnakeEngine(BOARD_COLS, BOARD_ROWS)
+    engine.snake = SnakeBody(BOARD_COLS, BOARD_ROWS, cycle[0])
+    for cell in cycle[1:length]:
+        engine.snake.push_head(cell)
+    engine.food = (-1, -1)  # park the food so the length stays fixed
+    return engine
+
+
+def time_engine(cycle, length):
+    engine = engine_on_cycle(cycle, length)
+    n = len(cycle)
+    steps = []
+    for i in range(TICKS):
+        a, b = cycle[(length - 1 + i) % n], cycle[(length + i) % n]
+        steps.append((b[0] - a[0], b[1] - a[1]))
+    engine.direction = steps[0]
+    start = time.perf_counter()
+    for direction in steps:
+        engine.step(direction)
+    elapsed = time.perf_counter() - start
+    assert engine.alive
+    return elapsed / TICKS
+
+
+def time_list(cycle, length):
+    # The original update_game body: membership scan, front insert, pop
+    snake = list(reversed(cycle[:length]))
+    n = len(cycle)
+    start = time.perf_counter()
+    for i in range(TICKS):
+        new_head = cycle[(length + i) % n]
+        if new_head in snake:
+            raise AssertionError("collision")
+        snake.insert(0, new_head)
+        snake.pop()
+    return (time.perf_counter() - start) / TICKS
+
+
+def main():
+    cycle = cycle_cells(BOARD_COLS, BOARD_ROWS)
+    full = len(cycle) - 1
+    print(f"{'length':>8} {'engine ns/tick':>16} {'list ns/tick':>14}")
+    for length in (1, 10, 100, 600, full):
+        engine_ns = time_engine(cycle, length) * 1e9
+        list_ns = time_list(cycle, length) * 1e9
+        print(f"{length:>8} {engine_ns:>16.0f} {list_ns:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
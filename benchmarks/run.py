@@ -0,0 +1,307 @@
+"""Benchmark suite with baseline comparison.
+
+Runs every benchmark headlessly (SDL dummy drivers), writes the results
+as JSON and compares them with a stored baseline. All metrics are times,
+so lower is better.
+
+The suite runs ``REPEATS`` times over, and each metric is the median of its
+runs. It is recorded with its spread and with the time of a fixed
+calibration loop run just before each run. Before comparing, a result is
+scaled by how much faster or slower the calibration loop ran than it did
+for the baseline. A metric regresses when it is more than ``threshold``
+slower than its baseline value, or more than ``NOISE_SIGMAS`` times the
+combined spread of the two runs when that is larger.
+
+    python benchmarks/run.py                      # run and compare with baseline.json
+    python benchmarks/run.py --update-baseline    # record the metrics run into the baseline
+    python benchmarks/run.py --only tick spawn    # run a subset
+
+Exits with status 1 if any metric regressed.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+from bench_tick import cycle_cells, time_engine  # noqa: E402
+from autopilot import Autopilot, play  # noqa: E402
+from board import SnakeBody, make_body  # noqa: E402
+from engine import BOARD_COLS, BOARD_ROWS, SnakeEngine  # noqa: E402
+from snake_env import OBS_TYPES, BatchSnakeEnv, SnakeEnv, measure  # noqa: E402
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+REPEATS = 7
+NOISE_SIGMAS = 4  # slowdowns within this many standard deviations of the noise are not regressions
+CALIBRATION_LOOPS = 200_000
+
+
+def timed(fn, scale=1.0, warm_up=True):
+    # (value, calibration) for one run; the calibration runs just before, at the same machine speed.
+    # Benchmarks are set up afresh each round, so a first untimed run fills caches.
+    if warm_up:
+        fn()
+    machine = calibrate()
+    return fn() * scale, machine
+
+
+def relative_spread(values):
+    # Scaled MAD over the median: about one standard deviation, as a fraction
+    median = statistics.median(values)
+    mad = statistics.median(abs(v - median) for v in values)
+    return 1.4826 * mad / median if median else 0.0
+
+
+def summarize(runs):
+    # Median value, the spread of value / calibration (the quantity the gate compares,
+    # so calibration noise counts too) and the median calibration time
+    values = [value for value, _ in runs]
+    spread = relative_spread([value / machine for value, machine in runs])
+    return statistics.median(values), spread, statistics.median(machine for _, machine in runs)
+
+
+def calibrate():
+    # A fixed pure-Python loop; its time tracks how fast this machine runs at the moment
+    start = time.perf_counter()
+    total = 0
+    for i in range(CALIBRATION_LOOPS):
+        total += i * i % 7
+    return (time.perf_counter() - start) / CALIBRATION_LOOPS * 1e9
+
+
+def bench_tick():
+    cycle = cycle_cells(BOARD_COLS, BOARD_ROWS)
+    return {f"tick_ns/length={length}": timed(lambda: time_engine(cycle, length), 1e9)
+            for length in (1, 100, len(cycle) - 1)}
+
+
+def bench_spawn(calls=20000):
+    cycle = cycle_cells(BOARD_COLS, BOARD_ROWS)
+    rng = random.Random(0)
+    results = {}
+    for fill in (10, 50, 95):
+        body = SnakeBody(BOARD_COLS, BOARD_ROWS, cycle[0])
+        for cell in cycle[1:len(cycle) * fill // 100]:
+            body.push_head(cell)
+
+        def run():
+            start = time.perf_counter()
+            for _ in range(calls):
+                body.random_free_cell(rng)
+            return (time.perf_counter() - start) / calls
+
+        results[f"spawn_ns/fill={fill}%"] = timed(run, 1e9)
+    return results
+
+
+def bench_render():
+    from bench_render import setup_game, time_frames
+    results = {}
+    for length in (10, 100, 500):
+        game = setup_game(length)
+        results[f"frame_ms/length={length}"] = timed(lambda: time_frames(game), 1e3)
+        game.scores.close()
+    return results
+
+
+def bench_particles():
+    from bench_particles import time_system
+    return {f"particles_ms/live={live}": timed(lambda: time_system(live)[0], 1e3)
+            for live in (1000, 10000, 50000)}
+
+
+def bench_world(cols=1000, rows=1000, frames=100):
+    # Large-world frame time should track the viewport, not the snake
+    from main import DOWN, SnakeGame
+    results = {}
+    for length in (100, 100000):
+        game = SnakeGame(world=(cols, rows))
+        game.start_new_game(seed=0)
+        engine = game.engine
+        # Serpentine from the top-left; the head ends on the last row used, heading down
+        rows_used = -(-length // cols)
+        cells = [(col, row) for row in range(rows_used)
+                 for col in (range(cols - 1, -1, -1) if row % 2 else range(cols))][:length]
+        engine.snake = make_body(cols, rows, cells[0])
+        for cell in cells[1:]:
+            engine.snake.push_head(cell)
+        engine.direction = DOWN
+        game.prev_head, game.prev_tail = engine.head, engine.snake.tail
+        engine.food = (cols - 1, rows - 1)
+
+        def run():
+            start = time.perf_counter()
+            for _ in range(frames):
+                game.update_game(1 / 60)
+                game.draw_game()
+            elapsed = time.perf_counter() - start
+            assert engine.alive
+            return elapsed / frames
+
+        results[f"world_frame_ms/length={length}"] = timed(run, 1e3)
+        game.scores.close()
+    return results
+
+
+def bench_autopilot(seed=7):
+    # One whole game on the default board, so the late moves run at full board length
+    def run():
+        engine = SnakeEngine(BOARD_COLS, BOARD_ROWS, seed=seed)
+        timings = []
+        play(engine, Autopilot(BOARD_COLS, BOARD_ROWS), 10_000_000, timings)
+        assert engine.won, "autopilot benchmark game did not clear the board"
+        return sum(timings) / len(timings)
+
+    return {"autopilot_us/decision": timed(run, 1e6, warm_up=False)}
+
+
+def bench_env(steps=20000, batch=256):
+    # Random actions, so games are short and resets are part of the cost
+    results = {}
+    for obs_type in OBS_TYPES:
+        env = SnakeEnv(obs_type)
+        results[f"env_step_us/obs={obs_type}"] = timed(
+            lambda: measure(env, steps, random.Random(0)), 1e6)
+    env = BatchSnakeEnv(batch, "grid")
+    results[f"env_step_us/batch={batch}"] = timed(
+        lambda: measure(env, steps * 10, random.Random(0)), 1e6)
+    return results
+
+
+def bench_cold_start():
+    # Wall time from launching the interpreter to main.py's first presented frame
+    def run():
+        # Run in a scratch directory so the score database is not created in the repo
+        with tempfile.TemporaryDirectory() as cwd:
+            start = time.perf_counter()
+            proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "main.py"), "--startup-time"],
+                                    cwd=cwd, stdout=subprocess.PIPE, text=True)
+            for line in proc.stdout:
+                if line.startswith("startup first_frame"):
+                    break
+            elapsed = time.perf_counter() - start
+            proc.wait()
+        return elapsed
+
+    return {"cold_start_ms": timed(run, 1e3, warm_up=False)}
+
+
+BENCHMARKS = {
+    "tick": bench_tick,
+    "spawn": bench_spawn,
+    "render": bench_render,
+    "particles": bench_particles,
+    "world": bench_world,
+    "autopilot": bench_autopilot,
+    "env": bench_env,
+    "cold_start": bench_cold_start,
+}
+
+
+def compare(results, baseline, threshold):
+    # Each result is scaled by the calibration ratio, so a machine that is slower
+    # across the board between the two runs does not read as a regression
+    regressions = []
+    base_results = baseline.get("results", {})
+    for name, value in results["results"].items():
+        base = base_results.get(name)
+        if base is None:
+            status = "new"
+        else:
+            adjusted = value
+            base_calibration = baseline.get("calibration_ns", {}).get(name)
+            if base_calibration:
+                adjusted *= base_calibration / results["calibration_ns"][name]
+            # Both medians are noisy, so their spreads add in quadrature
+            noise = math.hypot(results["noise"][name], baseline.get("noise", {}).get(name, 0.0))
+            allowed = max(threshold, NOISE_SIGMAS * noise)
+            change = (adjusted - base) / base if base else 0.0
+            status = f"{change:+.1%}"
+            if change > allowed:
+                status += "  REGRESSION"
+                regressions.append(name)
+        base_text = f"{base:.3f}" if base is not None else "-"
+        print(f"{name:<28} {value:>12.3f} {base_text:>12} {status:>14}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Elite Snake benchmark suite")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument("--output", default="bench_results.json", help="where to write results")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline results to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before a metric counts as a regression (0.25 = 25%%); "
+                             "noisy metrics get up to %d times their measured spread" % NOISE_SIGMAS)
+    parser.add_argument("--repeats", type=int, default=REPEATS,
+                        help="rounds of the whole suite; each metric is the median over them")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="write these results into the baseline file, keeping metrics not run")
+    args = parser.parse_args(argv)
+
+    # Whole rounds rather than back-to-back repeats, so every metric samples the machine
+    # across the full run instead of during one busy (or idle) stretch
+    runs = {}
+    for round_number in range(1, args.repeats + 1):
+        for name in args.only or BENCHMARKS:
+            print(f"round {round_number}/{args.repeats}: {name}...", file=sys.stderr)
+            for metric, run in BENCHMARKS[name]().items():
+                runs.setdefault(metric, []).append(run)
+    results, noise, calibration = {}, {}, {}
+    for metric, metric_runs in runs.items():
+        results[metric], noise[metric], calibration[metric] = summarize(metric_runs)
+
+    import pygame
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+        "noise": noise,
+        "calibration_ns": calibration,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        # Merge, so a partial run (--only) does not drop the metrics it skipped
+        merged = {"meta": report["meta"]}
+        for key in ("results", "noise", "calibration_ns"):
+            merged[key] = {**baseline.get(key, {}), **report[key]}
+        with open(args.baseline, "w") as f:
+            json.dump(merged, f, indent=2)
+        print(f"baseline written to {args.baseline} ({len(results)} metrics updated)")
+        return 0
+
+    print(f"{'metric':<28} {'value':>12} {'baseline':>12} {'change':>14}")
+    regressions = compare(report, baseline, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
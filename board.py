@@ -0,0 +1,232 @@
+"""Board data structures shared by the engines.
+
+``SnakeBody`` keeps the snake in a deque (head on the left) next to a flat
+occupancy grid, so moving, growing and the self-collision test are all O(1)
+regardless of snake length. ``FreeCells`` tracks the empty cells so food can
+be placed with a single random draw.
+
+Both are O(board area) to build, which stops paying off on very large
+worlds. There ``SparseSnakeBody`` keeps only the snake's own cells: a set of
+flat indices for occupancy and a per-chunk index so a renderer can find the
+segments inside a viewport without walking the whole body. ``make_body``
+picks the right one for a board size.
+"""
+from array import array
+from collections import deque
+
+
+class FreeCells:
+    """Set of free flat cell indices with O(1) add, remove and random choice.
+
+    ``cells[:count]`` holds the free cells and ``cells[count:]`` the taken
+    ones; ``slot[i]`` is the position of cell ``i`` in ``cells``. Removing
+    or adding a cell is a swap across the ``count`` boundary.
+    """
+
+    def __init__(self, size):
+        self.cells = array("i", range(size))
+        self.slot = array("i", range(size))
+        self.count = size
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, index):
+        return self.slot[index] < self.count
+
+    def _swap(self, a, b):
+        cells, slot = self.cells, self.slot
+        ca, cb = cells[a], cells[b]
+        cells[a], cells[b] = cb, ca
+        slot[ca], slot[cb] = b, a
+
+    def remove(self, index):
+        self.count -= 1
+        self._swap(self.slot[index], self.count)
+
+    def add(self, index):
+        self._swap(self.slot[index], self.count)
+        self.count += 1
+
+    def choice(self, rng):
+        if self.count == 0:
+            return None
+        return self.cells[rng.randrange(self.count)]
+
+
+class SnakeBody:
+    def __init__(self, cols, rows, start):
+        self.cols = cols
+        self.rows = rows
+        self.cells = deque()
+        self.grid = bytearray(cols * rows)
+        self.reset(start)
+
+    def reset(self, start):
+        self.cells.clear()
+        self.grid = bytearray(self.cols * self.rows)
+        self.free = FreeCells(self.cols * self.rows)
+        self.push_head(start)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def __getitem__(self, i):
+        # Indexing a deque is only O(1) at the ends; use for head/tail access
+        return self.cells[i]
+
+    def __contains__(self, cell):
+        return self.occupied(cell)
+
+    @property
+    def head(self):
+        return self.cells[0]
+
+    @property
+    def tail(self):
+        return self.cells[-1]
+
+    def occupied(self, cell):
+        col, row = cell
+        if not (0 <= col < self.cols and 0 <= row < self.rows):
+            return False
+        return self.grid[row * self.cols + col] != 0
+
+    def push_head(self, cell):
+        index = cell[1] * self.cols + cell[0]
+        self.cells.appendleft(cell)
+        self.grid[index] = 1
+        self.free.remove(index)
+
+    def pop_tail(self):
+        cell = self.cells.pop()
+        index = cell[1] * self.cols + cell[0]
+        self.grid[index] = 0
+        self.free.add(index)
+        return cell
+
+    def random_free_cell(self, rng):
+        # None when the snake covers the whole board
+        index = self.free.choice(rng)
+        if index is None:
+            return None
+        return (index % self.cols, index // self.cols)
+
+    def cells_in(self, left, top, right, bottom):
+        # Snake cells with left <= col < right and top <= row < bottom
+        cols, grid = self.cols, self.grid
+        for row in range(max(0, top), min(self.rows, bottom)):
+            base = row * cols
+            for col in range(max(0, left), min(cols, right)):
+                if grid[base + col]:
+                    yield (col, row)
+
+
+CHUNK_SIZE = 16  # cells per side of a SparseSnakeBody chunk
+DENSE_MAX_CELLS = 1 << 18  # larger boards use SparseSnakeBody
+FREE_CELL_TRIES = 64
+
+
+class SparseSnakeBody:
+    """Snake body whose memory and reset cost depend on its length, not the board.
+
+    Same interface as ``SnakeBody``. Occupancy is a set of flat cell indices,
+    and ``chunks`` maps ``(col // CHUNK_SIZE, row // CHUNK_SIZE)`` to the
+    cells in that chunk. Free cells are found by rejection sampling, which
+    takes a handful of draws unless the board is almost full.
+    """
+
+    def __init__(self, cols, rows, start):
+        self.cols = cols
+        self.rows = rows
+        self.cells = deque()
+        self.reset(start)
+
+    def reset(self, start):
+        self.cells.clear()
+        self.occupancy = set()
+        self.chunks = {}
+        self.push_head(start)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def __getitem__(self, i):
+        return self.cells[i]
+
+    def __contains__(self, cell):
+        return self.occupied(cell)
+
+    @property
+    def head(self):
+        return self.cells[0]
+
+    @property
+    def tail(self):
+        return self.cells[-1]
+
+    def occupied(self, cell):
+        col, row = cell
+        if not (0 <= col < self.cols and 0 <= row < self.rows):
+            return False
+        return row * self.cols + col in self.occupancy
+
+    def push_head(self, cell):
+        self.cells.appendleft(cell)
+        self.occupancy.add(cell[1] * self.cols + cell[0])
+        key = (cell[0] // CHUNK_SIZE, cell[1] // CHUNK_SIZE)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = set()
+        chunk.add(cell)
+
+    def pop_tail(self):
+        cell = self.cells.pop()
+        self.occupancy.discard(cell[1] * self.cols + cell[0])
+        key = (cell[0] // CHUNK_SIZE, cell[1] // CHUNK_SIZE)
+        chunk = self.chunks[key]
+        chunk.discard(cell)
+        if not chunk:
+            del self.chunks[key]
+        return cell
+
+    def random_free_cell(self, rng):
+        size = self.cols * self.rows
+        occupancy = self.occupancy
+        for _ in range(FREE_CELL_TRIES):
+            index = rng.randrange(size)
+            if index not in occupancy:
+                return (index % self.cols, index // self.cols)
+        # Nearly full board: pick the k-th free cell by scanning
+        free = size - len(occupancy)
+        if free <= 0:
+            return None
+        k = rng.randrange(free)
+        for index in range(size):
+            if index not in occupancy:
+                if k == 0:
+                    return (index % self.cols, index // self.cols)
+                k -= 1
+        return None
+
+    def cells_in(self, left, top, right, bottom):
+        # Only the chunks overlapping the rectangle are visited
+        chunks = self.chunks
+        for cy in range(max(0, top) // CHUNK_SIZE, (min(self.rows, bottom) - 1) // CHUNK_SIZE + 1):
+            for cx in range(max(0, left) // CHUNK_SIZE, (min(self.cols, right) - 1) // CHUNK_SIZE + 1):
+                for cell in chunks.get((cx, cy), ()):
+                    if left <= cell[0] < right and top <= cell[1] < bottom:
+                        yield cell
+
+
+def make_body(cols, rows, start):
+    # Dense structures for normal boards, sparse ones for huge worlds
+    if cols * rows > DENSE_MAX_CELLS:
+        return SparseSnakeBody(cols, rows, start)
+    return SnakeBody(cols, rows, start)
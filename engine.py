@@ -0,0 +1,365 @@
+"""Headless snake simulation.
+
+Holds the game rules from ``SnakeGame`` (movement, wall/self collision,
+food, scoring and levels) without touching pygame, so they can be stepped
+as fast as the CPU allows. ``SnakeEngine`` runs one board; ``BatchSnakeEngine``
+advances many independent boards at once with NumPy array ops.
+
+Positions are in cells, not pixels: ``(col, row)`` with ``(0, 0)`` at the
+top-left of the board.
+"""
+import argparse
+import random
+from enum import IntEnum
+
+from board import make_body
+
+try:
+    import numpy as np
+except ImportError:  # only BatchSnakeEngine needs NumPy
+    np = None
+
+# Board defaults (matches the 800x600 play area with 20px cells)
+BOARD_COLS = 40
+BOARD_ROWS = 30
+MIN_SIDE = 4
+MAX_SIDE = 65535  # replays store each side in 16 bits
+FPS = 60
+
+# Directions in cell units, indexed by action number
+UP = (0, -1)
+RIGHT = (1, 0)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+DIRECTIONS = (UP, RIGHT, DOWN, LEFT)
+DIRECTION_INDEX = {direction: i for i, direction in enumerate(DIRECTIONS)}
+
+# Food rules
+NORMAL_POINTS = 10
+NORMAL_GROWTH = 1
+SPECIAL_POINTS = 50
+SPECIAL_GROWTH = 3
+SPECIAL_FOOD_CHANCE = 0.3
+SPECIAL_FOOD_INTERVAL = 10.0  # seconds between special food rolls
+START_SPEED = 8
+MAX_SPEED = 15
+MAX_MOVE_RATE = 75  # moves/s at MAX_SPEED in play; headless runs can pass a higher max_rate
+
+
+class StepResult(IntEnum):
+    MOVED = 0
+    ATE = 1
+    DIED = 2
+    WON = 3
+
+
+def moves_per_second(speed, max_rate=MAX_MOVE_RATE, minimum=min, maximum=max):
+    # Up to speed 10 this is the classic "every (12 - speed) frames at 60 FPS";
+    # from there a straight line up to max_rate at MAX_SPEED, so every level is faster.
+    # Pass np.minimum and np.maximum to rate an array of speeds at once.
+    step = (max_rate - FPS / 2) / (MAX_SPEED - 10)
+    return FPS / (12 - minimum(speed, 10)) + step * maximum(0, speed - 10)
+
+
+def move_interval(speed, max_rate=MAX_MOVE_RATE):
+    # Seconds between moves
+    return 1.0 / moves_per_second(speed, max_rate)
+
+
+def level_for_score(score):
+    return score // 100 + 1
+
+
+def speed_for_level(level):
+    return min(MAX_SPEED, START_SPEED + level)
+
+
+def is_reverse(direction, current):
+    return direction[0] == -current[0] and direction[1] == -current[1]
+
+
+def parse_size(text):
+    # argparse type for the COLSxROWS board options of every command line
+    try:
+        cols, rows = (int(n) for n in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected COLSxROWS, got {text!r}")
+    if not (MIN_SIDE <= cols <= MAX_SIDE and MIN_SIDE <= rows <= MAX_SIDE):
+        raise argparse.ArgumentTypeError(f"board sides must be between {MIN_SIDE} and {MAX_SIDE} cells")
+    return cols, rows
+
+
+class SnakeEngine:
+    """A single headless board with step/reset semantics.
+
+    All gameplay randomness (food placement, special food rolls) comes from
+    ``rng``, so a game is fully determined by its seed and the direction
+    changes logged in ``turns`` as ``(tick, direction index)`` pairs.
+    """
+
+    def __init__(self, cols=BOARD_COLS, rows=BOARD_ROWS, rng=None, seed=None):
+        self.cols = cols
+        self.rows = rows
+        self.seed = seed
+        self.rng = rng or random.Random(seed)
+        self.reset()
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.seed = seed
+            self.rng = random.Random(seed)
+        self.snake = make_body(self.cols, self.rows, (self.cols // 2, self.rows // 2))
+        self.direction = RIGHT
+        self.grow_pending = 0
+        self.score = 0
+        self.level = 1
+        self.speed = START_SPEED
+        self.ticks = 0
+        self.turns = []
+        self._logged_direction = self.direction
+        self.alive = True
+        self.won = False
+        self.food = self.spawn_food()
+        self.food_type = "normal"
+        self.special_food_timer = 0.0
+        return self
+
+    @property
+    def head(self):
+        return self.snake[0]
+
+    def turn(self, direction):
+        # Same rule as the keyboard handler: no reversing into yourself
+        if is_reverse(direction, self.direction):
+            return False
+        self.direction = direction
+        return True
+
+    def spawn_food(self):
+        return self.snake.random_free_cell(self.rng)
+
+    def step(self, direction=None):
+        if not self.alive:
+            return StepResult.WON if self.won else StepResult.DIED
+        if direction is not None:
+            self.turn(direction)
+        if self.direction != self._logged_direction:
+            self.turns.append((self.ticks, DIRECTION_INDEX[self.direction]))
+            self._logged_direction = self.direction
+        self.ticks += 1
+
+        head = self.snake[0]
+        new_head = (head[0] + self.direction[0], head[1] + self.direction[1])
+
+        # Wall and self collision
+        if not (0 <= new_head[0] < self.cols and 0 <= new_head[1] < self.rows):
+            self.alive = False
+            return StepResult.DIED
+        if self.snake.occupied(new_head):
+            self.alive = False
+            return StepResult.DIED
+
+        self.snake.push_head(new_head)
+
+        if new_head == self.food:
+            result = StepResult.ATE
+            self.eat_food()
+            if self.food is None:
+                # Nowhere left to put food: the snake fills the board
+                self.alive = False
+                self.won = True
+                return StepResult.WON
+        else:
+            result = StepResult.MOVED
+            if self.grow_pending > 0:
+                self.grow_pending -= 1
+            else:
+                self.snake.pop_tail()
+
+        # Special food is rolled on wall-clock time, not per move
+        self.special_food_timer += move_interval(self.speed)
+        if self.special_food_timer > SPECIAL_FOOD_INTERVAL:
+            self.special_food_timer = 0.0
+            self.food_type = "special" if self.rng.random() < SPECIAL_FOOD_CHANCE else "normal"
+
+        return result
+
+    def eat_food(self):
+        if self.food_type == "special":
+            self.score += SPECIAL_POINTS
+            self.grow_pending += SPECIAL_GROWTH
+        else:
+            self.score += NORMAL_POINTS
+            self.grow_pending += NORMAL_GROWTH
+
+        new_level = level_for_score(self.score)
+        if new_level > self.level:
+            self.level = new_level
+            self.speed = speed_for_level(self.level)
+
+        self.food = self.spawn_food()
+        self.food_type = "normal"
+        self.special_food_timer = 0.0
+
+
+class BatchSnakeEngine:
+    """N independent boards advanced together with NumPy.
+
+    Each board keeps its body in a ring buffer of flat cell indices
+    (``row * cols + col``) alongside a boolean occupancy grid, so one
+    ``step`` is a handful of fancy-indexing ops over all boards regardless
+    of snake length. Dead boards stay dead until ``reset`` is called on them.
+    """
+
+    def __init__(self, n, cols=BOARD_COLS, rows=BOARD_ROWS, seed=None):
+        if np is None:
+            raise ImportError("BatchSnakeEngine requires numpy (pip install numpy)")
+        self.n = n
+        self.cols = cols
+        self.rows = rows
+        self.cells = cols * rows
+        self.rng = np.random.default_rng(seed)
+        self.directions = np.array(DIRECTIONS, dtype=np.int32)
+
+        self.occupied = np.zeros((n, self.cells), dtype=bool)
+        self.body = np.zeros((n, self.cells), dtype=np.int32)
+        self.head_ptr = np.zeros(n, dtype=np.int64)
+        self.length = np.zeros(n, dtype=np.int64)
+        self.head_x = np.zeros(n, dtype=np.int32)
+        self.head_y = np.zeros(n, dtype=np.int32)
+        self.action = np.zeros(n, dtype=np.int64)
+        self.grow_pending = np.zeros(n, dtype=np.int64)
+        self.food = np.zeros(n, dtype=np.int64)
+        self.food_special = np.zeros(n, dtype=bool)
+        self.special_food_timer = np.zeros(n, dtype=np.float64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.level = np.zeros(n, dtype=np.int64)
+        self.speed = np.zeros(n, dtype=np.int64)
+        self.alive = np.zeros(n, dtype=bool)
+        self.won = np.zeros(n, dtype=bool)
+        self._rows = np.arange(n)
+        self.reset()
+
+    def reset(self, boards=None):
+        idx = self._rows if boards is None else np.asarray(boards)
+        if idx.dtype == bool:
+            idx = np.flatnonzero(idx)
+        if idx.size == 0:
+            return
+
+        start = (self.rows // 2) * self.cols + self.cols // 2
+        self.occupied[idx] = False
+        self.occupied[idx, start] = True
+        self.body[idx, 0] = start
+        self.head_ptr[idx] = 0
+        self.length[idx] = 1
+        self.head_x[idx] = self.cols // 2
+        self.head_y[idx] = self.rows // 2
+        self.action[idx] = 1  # RIGHT
+        self.grow_pending[idx] = 0
+        self.food_special[idx] = False
+        self.special_food_timer[idx] = 0.0
+        self.score[idx] = 0
+        self.level[idx] = 1
+        self.speed[idx] = START_SPEED
+        self.alive[idx] = True
+        self.won[idx] = False
+        self._spawn_food(idx)
+
+    def _spawn_food(self, idx):
+        # A few rounds of vectorized rejection sampling cover the common case
+        for _ in range(4):
+            if idx.size == 0:
+                return
+            cand = self.rng.integers(0, self.cells, size=idx.size)
+            ok = ~self.occupied[idx, cand]
+            self.food[idx[ok]] = cand[ok]
+            idx = idx[~ok]
+        if idx.size == 0:
+            return
+        # Crowded boards: pick uniformly among the free cells
+        free = ~self.occupied[idx]
+        has_free = free.any(axis=1)
+        weights = self.rng.random((idx.size, self.cells)) * free
+        self.food[idx] = weights.argmax(axis=1)
+        full = idx[~has_free]
+        self.won[full] = True
+        self.alive[full] = False
+
+    def step(self, actions=None):
+        """Advance every live board by one move.
+
+        ``actions`` is an optional int array of indices into ``DIRECTIONS``;
+        reversing into the body is ignored as in the keyboard handler.
+        Returns an int8 array of ``StepResult`` values (dead boards report
+        ``DIED``, or ``WON`` if they filled the board).
+        """
+        if actions is not None:
+            actions = np.asarray(actions, dtype=np.int64)
+            reverse = (actions + 2) % 4 == self.action
+            self.action = np.where(reverse, self.action, actions)
+
+        result = np.full(self.n, StepResult.DIED, dtype=np.int8)
+        live = np.flatnonzero(self.alive)
+        if live.size == 0:
+            result[self.won] = StepResult.WON
+            return result
+
+        move = self.directions[self.action[live]]
+        nx = self.head_x[live] + move[:, 0]
+        ny = self.head_y[live] + move[:, 1]
+
+        in_bounds = (nx >= 0) & (nx < self.cols) & (ny >= 0) & (ny < self.rows)
+        new_head = np.where(in_bounds, ny * self.cols + nx, 0)
+        # The tail has not moved yet, so running into it is a collision
+        hit_self = self.occupied[live, new_head] & in_bounds
+        dead = ~in_bounds | hit_self
+        self.alive[live[dead]] = False
+
+        survivors = ~dead
+        live = live[survivors]
+        nx, ny, new_head = nx[survivors], ny[survivors], new_head[survivors]
+
+        self.head_x[live] = nx
+        self.head_y[live] = ny
+        self.head_ptr[live] = (self.head_ptr[live] + 1) % self.cells
+        self.body[live, self.head_ptr[live]] = new_head
+        self.occupied[live, new_head] = True
+
+        ate = new_head == self.food[live]
+        eaters = live[ate]
+        special = self.food_special[eaters]
+        self.score[eaters] += np.where(special, SPECIAL_POINTS, NORMAL_POINTS)
+        self.grow_pending[eaters] += np.where(special, SPECIAL_GROWTH, NORMAL_GROWTH)
+        # Eating keeps the tail this tick, as in the single-board rules
+        growing = ate | (self.grow_pending[live] > 0)
+        self.grow_pending[live[~ate & growing]] -= 1
+        self.length[live[growing]] += 1
+
+        shrink = live[~growing]
+        tail_ptr = (self.head_ptr[shrink] - self.length[shrink]) % self.cells
+        self.occupied[shrink, self.body[shrink, tail_ptr]] = False
+
+        self.level[eaters] = np.maximum(self.level[eaters], self.score[eaters] // 100 + 1)
+        self.speed[eaters] = np.minimum(MAX_SPEED, START_SPEED + self.level[eaters])
+        self.food_special[eaters] = False
+        self.special_food_timer[eaters] = 0.0
+        self._spawn_food(eaters)
+
+        # Special food roll, timed in seconds like the single-board engine
+        speed = self.speed[live]
+        rate = moves_per_second(speed, minimum=np.minimum, maximum=np.maximum)
+        self.special_food_timer[live] += 1.0 / rate
+        roll = live[self.special_food_timer[live] > SPECIAL_FOOD_INTERVAL]
+        self.special_food_timer[roll] = 0.0
+        self.food_special[roll] = self.rng.random(roll.size) < SPECIAL_FOOD_CHANCE
+
+        result[live] = np.where(ate, StepResult.ATE, StepResult.MOVED)
+        result[self.won] = StepResult.WON
+        return result
+
+    def snake_cells(self, board):
+        # Body of one board as (col, row) tuples, head first
+        ptrs = (self.head_ptr[board] - np.arange(self.length[board])) % self.cells
+        cells = self.body[board, ptrs]
+        return [(int(c % self.cols), int(c // self.cols)) for c in cells]
@@ -0,0 +1,49 @@
+"""Buffered steering input.
+
+Key presses go into a short FIFO instead of turning the snake straight
+away, and each simulation tick applies at most one of them. So two quick
+presses inside one move window (UP then LEFT) become two consecutive moves,
+rather than the second overwriting the first or being checked against a
+direction the snake never moved in. A press is checked when it is queued,
+against the direction the snake will have once the presses ahead of it
+are applied. The engine checks it again when the press is applied.
+
+Each press keeps the time it was read, so the tick that applies it can
+report key-to-move latency.
+"""
+import time
+from collections import deque
+
+from engine import is_reverse
+
+QUEUE_SIZE = 3  # presses beyond this many pending are dropped
+
+
+class InputQueue:
+    def __init__(self, size=QUEUE_SIZE, clock=time.perf_counter):
+        self.size = size
+        self.clock = clock
+        self.pending = deque()  # (timestamp, direction), oldest first
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self.pending)
+
+    def clear(self):
+        self.pending.clear()
+
+    def push(self, direction, current):
+        """Queue a press; ``current`` is the snake's direction now. Returns False if ignored."""
+        last = self.pending[-1][1] if self.pending else current
+        # Repeats would waste a tick, and reversals would fold the snake onto its neck
+        if direction == last or is_reverse(direction, last):
+            return False
+        if len(self.pending) >= self.size:
+            self.dropped += 1
+            return False
+        self.pending.append((self.clock(), direction))
+        return True
+
+    def pop(self):
+        """Oldest press as ``(timestamp, direction)``, or None."""
+        return self.pending.popleft() if self.pending else None
@@ -1,14 +1,30 @@
+import time
+START_TIME = time.perf_counter()  # --startup-time measures from here
+
 import pygame
 import random
 import math
 import sys
+import argparse
+import os
+import queue
+from functools import cached_property
+from itertools import islice
 from enum import Enum
-from dataclasses import dataclass
-from typing import List, Tuple
 
-# Initialize Pygame
-pygame.init()
-pygame.mixer.init()
+from arena import ArenaEngine, BOTS
+from audio import AudioPlayer
+from autopilot import Autopilot, hamiltonian_cycle
+from netplay import ANY_ROOM, MSG_DELTA, MSG_SNAPSHOT, ArenaMirror, NetClient
+from particles import ParticleSystem
+from engine import (SnakeEngine, StepResult, UP, DOWN, LEFT, RIGHT, MAX_MOVE_RATE, START_SPEED,
+                    move_interval, parse_size)
+from input_queue import InputQueue
+from timestep import FixedTimestep
+from replay import Replay, ReplayPlayer
+from scores import ScoreStore, DEFAULT_MODE, DEFAULT_PATH as SCORES_PATH
+from profiler import FrameProfiler
+from render_cache import SpriteCache, StaticLayer, TextCache, TEXT_GLOW_OFFSET, glow_padding
 
 # Constants
 WINDOW_WIDTH = 1000
@@ -18,6 +34,12 @@ GAME_HEIGHT = 600
 SIDEBAR_WIDTH = 200
 CELL_SIZE = 20
 FPS = 60
+BOARD_SIZE = (GAME_WIDTH // CELL_SIZE, GAME_HEIGHT // CELL_SIZE)
+ARENA_SIZE = (80, 60)
+GRADIENT_SEGMENTS = 22  # body segments past this index share one color
+FX_SEED_SALT = 0x5EED  # cosmetic randomness gets its own stream derived from the game seed
+ATTRACT_FRAMES_PER_MOVE = 3  # the menu's demo snake moves 20 times a second
+SNAPSHOT_TIMEOUT = 10  # seconds a --connect client waits for the room after joining
 
 # Colors (Modern UI Palette)
 class Colors:
@@ -44,113 +66,155 @@ class GameState(Enum):
     GAME_OVER = 4
     HIGH_SCORES = 5
 
-@dataclass
-class Particle:
-    x: float
-    y: float
-    dx: float
-    dy: float
-    life: float
-    max_life: float
-    color: Tuple[int, int, int]
-    size: float
-
 class SnakeGame:
-    def __init__(self):
+    # Sidebar stat lines: label, color, y offset
+    HUD_LINES = (
+        ("Score", Colors.WHITE, 100),
+        ("High", Colors.GOLD, 130),
+        ("Level", Colors.NEON_PINK, 160),
+        ("Speed", Colors.ORANGE, 190),
+        ("Length", Colors.NEON_GREEN, 220),
+    )
+    WIN_TITLE = "BOARD CLEARED!"
+    LIVE_STATES = (GameState.PLAYING,)  # states in which the game advances
+    
+    def __init__(self, dirty_rects=False, record_dir=None, replay=None, replay_speed=1.0,
+                 player="PLAYER", scores_path=SCORES_PATH, profile_path=None, startup_time=False,
+                 world=BOARD_SIZE, autopilot=False, max_move_rate=MAX_MOVE_RATE):
+        # Only what the first frame needs is initialized here; audio and caches come later
+        self.startup_time = startup_time
+        self.report_startup("imports")
+        pygame.display.init()
+        pygame.font.init()
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption("🐍 Elite Snake - Next Gen Gaming")
         self.clock = pygame.time.Clock()
         
         # Game state
         self.state = GameState.MENU
-        self.score = 0
-        self.high_score = self.load_high_score()
-        self.level = 1
-        self.speed = 8
         
-        # Snake properties
-        self.snake = [(GAME_WIDTH // 2, GAME_HEIGHT // 2)]
-        self.direction = (CELL_SIZE, 0)
-        self.grow_pending = 0
+        # Worlds bigger than the play area scroll with a camera; they get their own leaderboard
+        cols, rows = self.world = tuple(world)
+        self.camera_mode = cols * CELL_SIZE > GAME_WIDTH or rows * CELL_SIZE > GAME_HEIGHT
+        self.camera = (0, 0)
+        self.score_mode = DEFAULT_MODE if self.world == BOARD_SIZE else f"world-{cols}x{rows}"
         
-        # Food properties
-        self.food_pos = self.spawn_food()
-        self.food_type = "normal"
-        self.special_food_timer = 0
+        # Leaderboard lives in memory; the store opens and writes the database in the background
+        self.player = player
+        self.scores = ScoreStore(scores_path)
+        self.high_score = 0
+        self.scores_version = None  # store version behind high_score
+        
+        # Snake, food and scoring rules live in the headless engine
+        self.engine = SnakeEngine(cols, rows)
+        # The autopilot steers instead of the keyboard; its games stay off the leaderboard
+        self.autopilot = Autopilot(cols, rows) if autopilot else None
+        # Key presses wait here and are applied one per tick
+        self.input_queue = InputQueue()
         
         # Visual effects
-        self.particles = []
+        self.particles = ParticleSystem()
         self.screen_shake = 0
         self.food_pulse = 0
         self.trail_positions = []
+        self.sprite_cache = SpriteCache()
+        self.text_cache = TextCache()
+        
+        # Static layers, rebuilt only when the window size changes or on invalidate_layers()
+        self.menu_layer = StaticLayer(self.build_menu_layer)
+        self.background_layer = StaticLayer(self.build_background_layer)
+        self.board_layer = StaticLayer(self.build_board_layer)
+        self.grid_tile_layer = StaticLayer(self.build_grid_tile_layer)
+        self.sidebar_layer = StaticLayer(self.build_sidebar_layer)
+        
+        # Sidebar with stat values; lines are redrawn only when their value changes
+        self.hud_surface = None
+        self.hud_base = None
+        self.hud_values = [None] * len(self.HUD_LINES)
+        self.hud_dirty = []
         
-        # Fonts
-        self.font_large = pygame.font.Font(None, 48)
-        self.font_medium = pygame.font.Font(None, 32)
-        self.font_small = pygame.font.Font(None, 24)
+        # Dirty-rect mode pushes only changed regions instead of flipping the whole window
+        self.dirty_rendering = dirty_rects and not self.camera_mode
+        self.needs_full_redraw = True
+        self.prev_dynamic_rects = []
+        self.frame_dirty_rects = None
         
         # Animation timers
         self.menu_animation = 0
-        self.game_time = 0
+        self.attract_frames = 0
         
-        # Load sounds (create placeholder sound objects)
-        self.sounds = self.load_sounds()
+        # Gameplay randomness lives in the engine; shake and particles use this stream
+        self.fx_rng = random.Random()
         
-    def load_sounds(self):
-        # In a real implementation, you'd load actual sound files
-        # For now, we'll create placeholder sound objects
-        sounds = {}
-        try:
-            # sounds['eat'] = pygame.mixer.Sound('eat.wav')
-            # sounds['game_over'] = pygame.mixer.Sound('game_over.wav')
-            # sounds['level_up'] = pygame.mixer.Sound('level_up.wav')
-            pass
-        except:
-            pass
-        return sounds
-    
-    def load_high_score(self):
-        try:
-            with open('snake_highscore.txt', 'r') as f:
-                return int(f.read())
-        except:
-            return 0
+        # Replays: record finished games to record_dir, or play one back at replay_speed
+        self.record_dir = record_dir
+        self.replay = replay
+        self.replay_player = None
+        self.replay_speed = replay_speed
+        # Fastest the snake moves at top speed; only headless runs should raise it
+        self.max_move_rate = max_move_rate
+        
+        # Frame-phase timings; F3 toggles the overlay, --profile exports them on exit
+        self.profiler = FrameProfiler(enabled=profile_path is not None)
+        self.profile_path = profile_path
+        self.show_profiler = False
+        self.profiler_overlay = None
+        self.profiler_overlay_time = 0.0
+        self.profiler_font = None
+        
+        # Simulation ticks run on a fixed timestep, independent of the render rate
+        self.timestep = FixedTimestep()
+        self.interpolate = True
+        self.prev_head = self.engine.head
+        self.prev_tail = self.engine.snake.tail
+        
+        # Sound effects: the audio thread opens the mixer and builds the sound bank
+        # after the first frame; until it is ready, play() is a no-op
+        self.audio = AudioPlayer(on_ready=lambda: self.report_startup("audio"))
+        
+        # Sprites and text for the other screens are rendered a piece per menu frame
+        self.warmup = self.warm_caches()
+        self.report_startup("init")
     
-    def save_high_score(self):
-        try:
-            with open('snake_highscore.txt', 'w') as f:
-                f.write(str(self.high_score))
-        except:
-            pass
-    
-    def spawn_food(self):
-        while True:
-            x = random.randint(1, (GAME_WIDTH - CELL_SIZE) // CELL_SIZE) * CELL_SIZE
-            y = random.randint(1, (GAME_HEIGHT - CELL_SIZE) // CELL_SIZE) * CELL_SIZE
-            if (x, y) not in self.snake:
-                return (x, y)
+    # Fonts are created on first use
+    @cached_property
+    def font_large(self):
+        return pygame.font.Font(None, 48)
+    
+    @cached_property
+    def font_medium(self):
+        return pygame.font.Font(None, 32)
+    
+    @cached_property
+    def font_small(self):
+        return pygame.font.Font(None, 24)
+    
+    def report_startup(self, phase):
+        if self.startup_time:
+            print(f"startup {phase} {(time.perf_counter() - START_TIME) * 1e3:.1f} ms", flush=True)
+    
+    def warm_caches(self):
+        # Generator: each step renders one group of sprites off-screen, then yields a frame.
+        # Whatever lands on the screen is covered by the next menu frame.
+        size = self.screen.get_size()
+        self.background_layer.get(size)
+        yield
+        self.sidebar_layer.get(size)
+        self.update_hud()
+        yield
+        self.draw_snake(0, 0)
+        self.draw_food(0, 0)
+        yield
+        self.draw_high_scores()
+        yield
+        self.draw_paused()
+        self.report_startup("warm")
     
     def create_explosion_particles(self, x, y, color):
-        for _ in range(15):
-            angle = random.uniform(0, 2 * math.pi)
-            speed = random.uniform(2, 8)
-            self.particles.append(Particle(
-                x, y,
-                math.cos(angle) * speed,
-                math.sin(angle) * speed,
-                60, 60, color,
-                random.uniform(2, 5)
-            ))
+        self.particles.burst(x, y, color, count=15, speed=(2, 8), life=60, size=(2, 5))
     
     def update_particles(self):
-        for particle in self.particles[:]:
-            particle.x += particle.dx
-            particle.y += particle.dy
-            particle.life -= 1
-            particle.dy += 0.1  # Gravity
-            
-            if particle.life <= 0:
-                self.particles.remove(particle)
+        self.particles.update()
     
     def draw_gradient_rect(self, surface, rect, color1, color2):
         for y in range(rect.height):
@@ -161,31 +225,77 @@ class SnakeGame:
             pygame.draw.line(surface, (r, g, b), 
                            (rect.x, rect.y + y), (rect.x + rect.width, rect.y + y))
     
-    def draw_neon_text(self, text, font, color, x, y, glow=True):
+    def draw_neon_text(self, text, font, color, x, y, glow=True, surface=None):
+        if surface is None:
+            surface = self.screen
+        # Glow copies and main text come pre-composited from the text cache
+        text_surf = self.text_cache.text(text, font, color, glow)
         if glow:
-            # Draw glow effect
-            for offset in [(2, 2), (-2, -2), (2, -2), (-2, 2)]:
-                glow_surf = font.render(text, True, (color[0]//3, color[1]//3, color[2]//3))
-                self.screen.blit(glow_surf, (x + offset[0], y + offset[1]))
-        
-        # Draw main text
-        text_surf = font.render(text, True, color)
-        self.screen.blit(text_surf, (x, y))
+            surface.blit(text_surf, (x - TEXT_GLOW_OFFSET, y - TEXT_GLOW_OFFSET))
+            return text_surf.get_rect(topleft=(x - TEXT_GLOW_OFFSET, y - TEXT_GLOW_OFFSET))
+        surface.blit(text_surf, (x, y))
         return text_surf.get_rect(topleft=(x, y))
     
     def draw_glowing_rect(self, surface, rect, color, glow_size=3):
-        # Draw glow layers
-        for i in range(glow_size):
-            alpha = 50 - (i * 15)
-            if alpha <= 0:
-                continue
-            glow_surf = pygame.Surface((rect.width + i*4, rect.height + i*4), pygame.SRCALPHA)
-            glow_color = (*color, alpha)
-            pygame.draw.rect(glow_surf, glow_color, glow_surf.get_rect(), border_radius=5)
-            surface.blit(glow_surf, (rect.x - i*2, rect.y - i*2))
+        # Glow layers and main rectangle come pre-composited from the sprite cache
+        sprite = self.sprite_cache.glow_rect((rect.width, rect.height), color, glow_size)
+        pad = glow_padding(glow_size)
+        surface.blit(sprite, (rect.x - pad, rect.y - pad))
+    
+    def invalidate_layers(self):
+        # Call after changing Colors so the static layers pick up the new theme
+        for layer in (self.menu_layer, self.background_layer, self.board_layer,
+                      self.grid_tile_layer, self.sidebar_layer):
+            layer.invalidate()
+    
+    def build_menu_layer(self):
+        layer = pygame.Surface(self.screen.get_size()).convert()
+        self.draw_gradient_rect(layer, layer.get_rect(), Colors.GRADIENT_START, Colors.GRADIENT_END)
+        return layer
+    
+    def build_board_layer(self):
+        layer = pygame.Surface((GAME_WIDTH, GAME_HEIGHT)).convert()
+        layer.fill(Colors.GAME_BG)
+        pygame.draw.rect(layer, Colors.NEON_BLUE, layer.get_rect(), 2)
         
-        # Draw main rectangle
-        pygame.draw.rect(surface, color, rect, border_radius=5)
+        # Grid (subtle)
+        for x in range(0, GAME_WIDTH, CELL_SIZE):
+            pygame.draw.line(layer, (40, 40, 50), (x, 0), (x, GAME_HEIGHT))
+        for y in range(0, GAME_HEIGHT, CELL_SIZE):
+            pygame.draw.line(layer, (40, 40, 50), (0, y), (GAME_WIDTH, y))
+        return layer
+    
+    def build_grid_tile_layer(self):
+        # One cell larger than the play area so it can be shifted by the camera's sub-cell offset
+        layer = pygame.Surface((GAME_WIDTH + CELL_SIZE, GAME_HEIGHT + CELL_SIZE)).convert()
+        layer.fill(Colors.GAME_BG)
+        for x in range(0, layer.get_width(), CELL_SIZE):
+            pygame.draw.line(layer, (40, 40, 50), (x, 0), (x, layer.get_height()))
+        for y in range(0, layer.get_height(), CELL_SIZE):
+            pygame.draw.line(layer, (40, 40, 50), (0, y), (layer.get_width(), y))
+        return layer
+    
+    def build_background_layer(self):
+        layer = pygame.Surface(self.screen.get_size()).convert()
+        layer.fill(Colors.DARK_BG)
+        layer.blit(self.board_layer.get(self.screen.get_size()), (0, 0))
+        return layer
+    
+    def build_sidebar_layer(self):
+        layer = pygame.Surface((SIDEBAR_WIDTH, WINDOW_HEIGHT)).convert()
+        layer.fill(Colors.SIDEBAR_BG)
+        
+        # Headings and control hints never change during a game
+        self.draw_neon_text("STATS", self.font_medium, Colors.NEON_BLUE, 20, 50, surface=layer)
+        self.draw_neon_text("CONTROLS", self.font_medium, Colors.NEON_BLUE, 20, 300, surface=layer)
+        controls = [
+            "WASD / Arrows - Move",
+            "ESC - Pause"
+        ]
+        for i, control in enumerate(controls):
+            self.draw_neon_text(control, self.font_small, Colors.GRAY,
+                               20, 340 + i * 25, False, surface=layer)
+        return layer
     
     def handle_menu_events(self, event):
         if event.type == pygame.KEYDOWN:
@@ -201,135 +311,151 @@ class SnakeGame:
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_ESCAPE:
                 self.state = GameState.PAUSED
-            elif event.key in [pygame.K_LEFT, pygame.K_a] and self.direction != (CELL_SIZE, 0):
-                self.direction = (-CELL_SIZE, 0)
-            elif event.key in [pygame.K_RIGHT, pygame.K_d] and self.direction != (-CELL_SIZE, 0):
-                self.direction = (CELL_SIZE, 0)
-            elif event.key in [pygame.K_UP, pygame.K_w] and self.direction != (0, CELL_SIZE):
-                self.direction = (0, -CELL_SIZE)
-            elif event.key in [pygame.K_DOWN, pygame.K_s] and self.direction != (0, -CELL_SIZE):
-                self.direction = (0, CELL_SIZE)
+            elif self.replay_player is not None or self.autopilot is not None:
+                pass  # steering comes from the replay or the autopilot
+            elif event.key in [pygame.K_LEFT, pygame.K_a]:
+                self.steer(LEFT)
+            elif event.key in [pygame.K_RIGHT, pygame.K_d]:
+                self.steer(RIGHT)
+            elif event.key in [pygame.K_UP, pygame.K_w]:
+                self.steer(UP)
+            elif event.key in [pygame.K_DOWN, pygame.K_s]:
+                self.steer(DOWN)
         return True
     
-    def start_new_game(self):
+    def steer(self, direction):
+        self.input_queue.push(direction, self.engine.direction)
+    
+    def apply_input(self, turn):
+        # Apply the oldest queued press with `turn`; its key-to-move latency goes to the profiler
+        press = self.input_queue.pop()
+        if press is not None and turn(press[1]):
+            self.profiler.record("input_latency", time.perf_counter() - press[0])
+    
+    def start_new_game(self, seed=None):
+        if self.replay is not None:
+            seed = self.replay.seed
+            self.replay_player = ReplayPlayer(self.replay)
+        elif seed is None:
+            seed = random.getrandbits(32)
         self.state = GameState.PLAYING
-        self.score = 0
-        self.level = 1
-        self.speed = 8
-        self.snake = [(GAME_WIDTH // 2, GAME_HEIGHT // 2)]
-        self.direction = (CELL_SIZE, 0)
-        self.grow_pending = 0
-        self.food_pos = self.spawn_food()
-        self.food_type = "normal"
+        self.engine.reset(seed)
+        self.input_queue.clear()
+        self.fx_rng.seed(seed ^ FX_SEED_SALT)
+        self.particles.reseed(seed ^ FX_SEED_SALT)
+        self.timestep.reset()
+        self.prev_head = self.engine.head
+        self.prev_tail = self.engine.snake.tail
         self.particles.clear()
         self.trail_positions.clear()
     
-    def update_game(self):
-        self.game_time += 1
-        
-        # Move snake every few frames based on speed
-        if self.game_time % max(1, 12 - self.speed) == 0:
-            # Add current head to trail
-            head = self.snake[0]
-            self.trail_positions.append((head[0], head[1], 20))  # x, y, life
-            
-            # Update trail
-            self.trail_positions = [(x, y, life-1) for x, y, life in self.trail_positions if life > 0]
-            
-            # Move snake
-            new_head = (head[0] + self.direction[0], head[1] + self.direction[1])
-            
-            # Check wall collision
-            if (new_head[0] < 0 or new_head[0] >= GAME_WIDTH or 
-                new_head[1] < 0 or new_head[1] >= GAME_HEIGHT):
-                self.game_over()
-                return
-            
-            # Check self collision
-            if new_head in self.snake:
-                self.game_over()
-                return
-            
-            self.snake.insert(0, new_head)
-            
-            # Check food collision
-            if new_head == self.food_pos:
-                self.eat_food()
-            else:
-                if self.grow_pending > 0:
-                    self.grow_pending -= 1
-                else:
-                    self.snake.pop()
-        
-        # Update special food timer
-        self.special_food_timer += 1
-        if self.special_food_timer > 600:  # 10 seconds at 60 FPS
-            self.special_food_timer = 0
-            self.food_type = "special" if random.random() < 0.3 else "normal"
-        
+    def update_game(self, dt=1 / FPS):
+        # Run as many fixed-rate moves as the elapsed time calls for
+        if self.replay_player is not None:
+            dt *= self.replay_speed
+        self.timestep.add(dt)
+        with self.profiler.section("simulation"):
+            while self.timestep.consume(self.tick_interval()):
+                if not self.tick():
+                    return
+        self.update_effects()
+    
+    def update_effects(self):
         # Update food pulse animation
         self.food_pulse = (self.food_pulse + 0.2) % (2 * math.pi)
         
         # Update particles
-        self.update_particles()
+        with self.profiler.section("update_particles"):
+            self.update_particles()
         
         # Update screen shake
         if self.screen_shake > 0:
             self.screen_shake -= 1
     
-    def eat_food(self):
-        if self.food_type == "special":
-            points = 50
-            self.grow_pending += 3
-            self.create_explosion_particles(self.food_pos[0], self.food_pos[1], Colors.GOLD)
-        else:
-            points = 10
-            self.grow_pending += 1
-            self.create_explosion_particles(self.food_pos[0], self.food_pos[1], Colors.NEON_GREEN)
+    def tick(self):
+        # One simulation move; returns False once the game has ended
+        head = self.engine.head
+        self.prev_head = head
+        self.prev_tail = self.engine.snake.tail
         
-        self.score += points
-        if self.score > self.high_score:
-            self.high_score = self.score
+        # Add current head to trail
+        self.trail_positions.append((head[0] * CELL_SIZE, head[1] * CELL_SIZE, 20))  # x, y, life
         
-        # Level up logic
-        new_level = (self.score // 100) + 1
-        if new_level > self.level:
-            self.level = new_level
-            self.speed = min(15, 8 + self.level)
+        # Update trail
+        self.trail_positions = [(x, y, life-1) for x, y, life in self.trail_positions if life > 0]
+        
+        # Move snake (collisions, growth and special food rolls happen in the engine)
+        food_pos, food_type = self.engine.food, self.engine.food_type
+        if self.replay_player is not None:
+            # Recorded directions were validated when played, so they bypass the turn rules
+            direction = self.replay_player.direction_for(self.engine.ticks)
+            if direction is not None:
+                self.engine.direction = direction
+        elif self.autopilot is not None:
+            direction = self.autopilot.decide(self.engine)
+            if direction is not None:
+                self.engine.turn(direction)
+        else:
+            self.apply_input(self.engine.turn)
+        level = self.engine.level
+        result = self.engine.step()
+        if self.engine.level > level:
+            self.audio.play("level_up")
+        if result == StepResult.DIED:
+            self.game_over()
+            return False
+        if result in (StepResult.ATE, StepResult.WON):
+            self.eat_food(food_pos, food_type)
+        if result == StepResult.WON:
+            self.game_over()
+            return False
+        return True
+    
+    def eat_food(self, food_pos, food_type):
+        # Scoring and growth already happened in the engine; this is the feedback
+        x, y = food_pos[0] * CELL_SIZE, food_pos[1] * CELL_SIZE
+        if food_type == "special":
+            self.create_explosion_particles(x, y, Colors.GOLD)
+            self.audio.play("special")
+        else:
+            self.create_explosion_particles(x, y, Colors.NEON_GREEN)
+            self.audio.play("eat")
         
-        self.food_pos = self.spawn_food()
-        self.food_type = "normal"
-        self.special_food_timer = 0
+        if self.engine.score > self.high_score and self.replay_player is None and self.autopilot is None:
+            self.high_score = self.engine.score
     
     def game_over(self):
         self.state = GameState.GAME_OVER
-        self.save_high_score()
+        self.audio.play("won" if self.engine.won else "game_over")
+        if self.replay_player is None:
+            if self.engine.score > 0 and self.autopilot is None:
+                self.scores.submit(self.player, self.engine.score, self.score_mode,
+                                   seed=self.engine.seed)
+            if self.record_dir:
+                self.save_replay()
         self.screen_shake = 20
         # Create big explosion
-        for _ in range(30):
-            angle = random.uniform(0, 2 * math.pi)
-            speed = random.uniform(3, 12)
-            self.particles.append(Particle(
-                self.snake[0][0] + CELL_SIZE//2, self.snake[0][1] + CELL_SIZE//2,
-                math.cos(angle) * speed, math.sin(angle) * speed,
-                120, 120, Colors.RED, random.uniform(3, 8)
-            ))
+        head_x, head_y = self.engine.head[0] * CELL_SIZE, self.engine.head[1] * CELL_SIZE
+        self.particles.burst(head_x + CELL_SIZE//2, head_y + CELL_SIZE//2, Colors.RED,
+                             count=30, speed=(3, 12), life=120, size=(3, 8))
+    
+    def save_replay(self):
+        try:
+            os.makedirs(self.record_dir, exist_ok=True)
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{self.engine.score}-{self.engine.seed}.snkr"
+            Replay.from_engine(self.engine).save(os.path.join(self.record_dir, name))
+        except OSError as e:
+            print(f"Could not save replay: {e}", file=sys.stderr)
     
     def draw_menu(self):
         # Animated background
         self.menu_animation += 0.02
         
         # Gradient background
-        self.draw_gradient_rect(self.screen, pygame.Rect(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT),
-                               Colors.GRADIENT_START, Colors.GRADIENT_END)
+        self.screen.blit(self.menu_layer.get(self.screen.get_size()), (0, 0))
         
-        # Animated particles in background
-        for i in range(50):
-            x = (i * 20 + self.menu_animation * 50) % WINDOW_WIDTH
-            y = 100 + math.sin(self.menu_animation + i * 0.1) * 50
-            alpha = int(128 + 127 * math.sin(self.menu_animation * 2 + i))
-            color = (*Colors.NEON_BLUE, alpha)
-            pygame.draw.circle(self.screen, Colors.NEON_BLUE, (int(x), int(y)), 2)
+        # Attract mode: an autopilot game plays behind the menu
+        self.draw_attract()
         
         # Title
         title_y = 150 + math.sin(self.menu_animation) * 10
@@ -353,98 +479,316 @@ class SnakeGame:
         self.draw_neon_text(f"High Score: {self.high_score}", self.font_medium, Colors.GOLD,
                            WINDOW_WIDTH//2 - 80, menu_y + 120)
     
+    @cached_property
+    def attract(self):
+        cols, rows = WINDOW_WIDTH // CELL_SIZE, WINDOW_HEIGHT // CELL_SIZE
+        return SnakeEngine(cols, rows, seed=random.getrandbits(32)), Autopilot(cols, rows)
+    
+    def draw_attract(self):
+        engine, autopilot = self.attract
+        self.attract_frames += 1
+        if self.attract_frames % ATTRACT_FRAMES_PER_MOVE == 0:
+            if engine.step(autopilot.decide(engine)) in (StepResult.DIED, StepResult.WON):
+                engine.reset(random.getrandbits(32))
+        
+        # Dimmed so the menu text stays readable
+        body = self.sprite_cache.rounded_rect((CELL_SIZE-2, CELL_SIZE-2), Colors.WHITE, 60)
+        self.screen.blits([(body, (col * CELL_SIZE + 1, row * CELL_SIZE + 1))
+                           for col, row in engine.snake], doreturn=False)
+        head = self.sprite_cache.rounded_rect((CELL_SIZE, CELL_SIZE), Colors.WHITE, 150)
+        self.screen.blit(head, (engine.head[0] * CELL_SIZE, engine.head[1] * CELL_SIZE))
+        if engine.food is not None:
+            food = self.sprite_cache.rounded_rect((CELL_SIZE-4, CELL_SIZE-4), Colors.RED, 140)
+            self.screen.blit(food, (engine.food[0] * CELL_SIZE + 2, engine.food[1] * CELL_SIZE + 2))
+    
     def draw_game(self):
         # Apply screen shake
         shake_x = shake_y = 0
         if self.screen_shake > 0:
-            shake_x = random.randint(-3, 3)
-            shake_y = random.randint(-3, 3)
+            shake_x = self.fx_rng.randint(-3, 3)
+            shake_y = self.fx_rng.randint(-3, 3)
         
-        # Background
-        self.screen.fill(Colors.DARK_BG)
+        if self.camera_mode:
+            self.draw_world(shake_x, shake_y)
+            return
         
-        # Game area
-        game_rect = pygame.Rect(shake_x, shake_y, GAME_WIDTH, GAME_HEIGHT)
-        pygame.draw.rect(self.screen, Colors.GAME_BG, game_rect)
-        pygame.draw.rect(self.screen, Colors.NEON_BLUE, game_rect, 2)
+        # Only the changed regions are redrawn when nothing forces a full frame
+        if self.dirty_rendering and not self.needs_full_redraw and not (shake_x or shake_y):
+            self.draw_game_dirty()
+            return
         
-        # Grid (subtle)
-        for x in range(0, GAME_WIDTH, CELL_SIZE):
-            pygame.draw.line(self.screen, (40, 40, 50), 
-                           (x + shake_x, shake_y), (x + shake_x, GAME_HEIGHT + shake_y))
-        for y in range(0, GAME_HEIGHT, CELL_SIZE):
-            pygame.draw.line(self.screen, (40, 40, 50),
-                           (shake_x, y + shake_y), (GAME_WIDTH + shake_x, y + shake_y))
+        # Background, game area and grid come from the static layers
+        profiler = self.profiler
+        with profiler.section("draw_grid"):
+            window_size = self.screen.get_size()
+            if shake_x or shake_y:
+                self.screen.fill(Colors.DARK_BG)
+                self.screen.blit(self.board_layer.get(window_size), (shake_x, shake_y))
+            else:
+                self.screen.blit(self.background_layer.get(window_size), (0, 0))
         
-        # Draw trail
+        with profiler.section("draw_trail"):
+            self.draw_trail(shake_x, shake_y)
+        with profiler.section("draw_snake"):
+            self.draw_snake(shake_x, shake_y)
+        with profiler.section("draw_food"):
+            self.draw_food(shake_x, shake_y)
+        with profiler.section("draw_particles"):
+            particle_sprites = self.particles.sprites()
+            self.draw_particles(particle_sprites, shake_x, shake_y)
+        
+        # Sidebar
+        with profiler.section("draw_sidebar"):
+            self.screen.blit(self.update_hud(), (GAME_WIDTH, 0))
+        
+        # A shaken frame leaves everything offset, so the next one must be full too
+        self.needs_full_redraw = bool(shake_x or shake_y)
+        if self.dirty_rendering:
+            self.prev_dynamic_rects = self.dynamic_rects(particle_sprites)
+    
+    def camera_focus(self):
+        # Current and previous cell of the head the camera follows
+        return self.engine.head, self.prev_head
+    
+    def update_camera(self):
+        # Center on the interpolated head, clamped so the view stays inside the world
+        alpha = self.render_alpha()
+        head, prev = self.camera_focus()
+        world_w = self.world[0] * CELL_SIZE
+        world_h = self.world[1] * CELL_SIZE
+        x = (prev[0] + (head[0] - prev[0]) * alpha + 0.5) * CELL_SIZE - GAME_WIDTH // 2
+        y = (prev[1] + (head[1] - prev[1]) * alpha + 0.5) * CELL_SIZE - GAME_HEIGHT // 2
+        self.camera = (max(0, min(int(x), world_w - GAME_WIDTH)),
+                       max(0, min(int(y), world_h - GAME_HEIGHT)))
+        return self.camera
+    
+    def draw_world(self, shake_x, shake_y):
+        # Camera view of a large world: only the viewport's cells and chunks are touched,
+        # so the cost does not grow with the world or the snake
+        screen = self.screen
+        profiler = self.profiler
+        cam_x, cam_y = self.update_camera()
+        offset_x, offset_y = shake_x - cam_x, shake_y - cam_y
+        view = pygame.Rect(0, 0, GAME_WIDTH, GAME_HEIGHT)
+        world = pygame.Rect(offset_x, offset_y, self.world[0] * CELL_SIZE, self.world[1] * CELL_SIZE)
+        
+        with profiler.section("draw_grid"):
+            screen.fill(Colors.DARK_BG)
+            screen.set_clip(view.clip(world))
+            tile = self.grid_tile_layer.get(screen.get_size())
+            screen.blit(tile, (shake_x - cam_x % CELL_SIZE, shake_y - cam_y % CELL_SIZE))
+            screen.set_clip(view)
+            pygame.draw.rect(screen, Colors.NEON_BLUE, world, 2)
+        
+        # Cells under the viewport, with a one-cell margin for interpolated movement
+        left, top = cam_x // CELL_SIZE - 1, cam_y // CELL_SIZE - 1
+        self.draw_world_view(offset_x, offset_y, left, top,
+                             left + GAME_WIDTH // CELL_SIZE + 3, top + GAME_HEIGHT // CELL_SIZE + 3)
+        with profiler.section("draw_particles"):
+            self.draw_particles(self.particles.sprites(), offset_x, offset_y)
+        screen.set_clip(None)
+        
+        with profiler.section("draw_sidebar"):
+            screen.blit(self.update_hud(), (GAME_WIDTH, 0))
+    
+    def draw_world_view(self, offset_x, offset_y, left, top, right, bottom):
+        # Trail, snake and food inside the given cell rectangle
+        profiler = self.profiler
+        with profiler.section("draw_trail"):
+            self.draw_trail(offset_x, offset_y)
+        with profiler.section("draw_snake"):
+            visible = set(self.engine.snake.cells_in(left, top, right, bottom))
+            self.draw_snake(offset_x, offset_y, visible)
+        with profiler.section("draw_food"):
+            self.draw_food(offset_x, offset_y)
+    
+    def draw_game_dirty(self):
+        # Erase last frame's moving parts and draw this frame's, touching only those rects
+        screen = self.screen
+        profiler = self.profiler
+        with profiler.section("draw_grid"):
+            screen_rect = screen.get_rect()
+            background = self.background_layer.get(screen.get_size())
+            particle_sprites = self.particles.sprites()
+            current = self.dynamic_rects(particle_sprites)
+            dirty = [rect.clip(screen_rect) for rect in self.prev_dynamic_rects + current]
+            dirty = [rect for rect in dirty if rect.width and rect.height]
+            for rect in dirty:
+                screen.blit(background, rect, rect)
+        
+        with profiler.section("draw_trail"):
+            self.draw_trail(0, 0)
+        with profiler.section("draw_snake"):
+            self.draw_snake(0, 0, self.snake_cells_in(dirty))
+        with profiler.section("draw_food"):
+            self.draw_food(0, 0)
+        with profiler.section("draw_particles"):
+            self.draw_particles(particle_sprites, 0, 0)
+        
+        # The sidebar is drawn over anything that strayed into it, as in a full frame
+        with profiler.section("draw_sidebar"):
+            hud = self.update_hud()
+            dirty.extend(self.hud_dirty)
+            sidebar = pygame.Rect(GAME_WIDTH, 0, SIDEBAR_WIDTH, WINDOW_HEIGHT)
+            for rect in dirty:
+                clip = rect.clip(sidebar)
+                if clip.width and clip.height:
+                    screen.blit(hud, clip, clip.move(-GAME_WIDTH, 0))
+        
+        self.prev_dynamic_rects = current
+        self.frame_dirty_rects = dirty
+    
+    def dynamic_rects(self, particle_sprites):
+        # Screen rects of everything that can change from one frame to the next
+        rects = []
+        for x, y, life in self.trail_positions:
+            rects.append(pygame.Rect(x + 1, y + 1, CELL_SIZE-2, CELL_SIZE-2))
+        
+        # The gradient part of the body recolors as the snake moves; the tail leaves its cell
+        snake = self.engine.snake
+        for cell in islice(snake, GRADIENT_SEGMENTS):
+            rects.append(self.cell_rect(cell))
+        # Interpolated head and tail lie between their previous and current cells
+        tail_rect = self.cell_rect(snake.tail).union(self.cell_rect(self.prev_tail))
+        rects.append(tail_rect)
+        head_pad = glow_padding(2)
+        head_rect = self.cell_rect(snake.head).union(self.cell_rect(self.prev_head))
+        rects.append(head_rect.inflate(head_pad * 2, head_pad * 2))
+        
+        if self.engine.food is not None:
+            # Largest pulse (3px) plus glow, so the food rect does not change between frames
+            food_pad = 3 + glow_padding(3) + 1
+            rects.append(self.cell_rect(self.engine.food).inflate(food_pad * 2, food_pad * 2))
+        
+        for x, y, radius, color, alpha in particle_sprites:
+            rects.append(pygame.Rect(int(x), int(y), radius * 2 + 1, radius * 2 + 1))
+        return rects
+    
+    def cell_rect(self, cell):
+        return pygame.Rect(cell[0] * CELL_SIZE, cell[1] * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+    
+    def snake_cells_in(self, rects):
+        # Snake cells under any of the given screen rects
+        snake = self.engine.snake
+        cells = set()
+        for rect in rects:
+            cells.update(snake.cells_in(rect.left // CELL_SIZE, rect.top // CELL_SIZE,
+                                        (rect.right - 1) // CELL_SIZE + 1,
+                                        (rect.bottom - 1) // CELL_SIZE + 1))
+        return cells
+    
+    def draw_trail(self, offset_x, offset_y):
         for x, y, life in self.trail_positions:
             alpha = int(life * 12.75)  # 255 / 20
-            trail_color = (*Colors.NEON_GREEN, alpha)
-            trail_surf = pygame.Surface((CELL_SIZE-2, CELL_SIZE-2), pygame.SRCALPHA)
-            pygame.draw.rect(trail_surf, trail_color, trail_surf.get_rect(), border_radius=3)
-            self.screen.blit(trail_surf, (x + 1 + shake_x, y + 1 + shake_y))
-        
-        # Draw snake with gradient effect
-        for i, (x, y) in enumerate(self.snake):
-            if i == 0:  # Head
-                head_rect = pygame.Rect(x + shake_x, y + shake_y, CELL_SIZE, CELL_SIZE)
-                self.draw_glowing_rect(self.screen, head_rect, Colors.NEON_GREEN, 2)
-                # Eyes
-                pygame.draw.circle(self.screen, Colors.WHITE, 
-                                 (x + 5 + shake_x, y + 5 + shake_y), 2)
-                pygame.draw.circle(self.screen, Colors.WHITE,
-                                 (x + 15 + shake_x, y + 5 + shake_y), 2)
-            else:  # Body
-                intensity = max(50, 255 - i * 10)
-                body_color = (0, intensity, 0)
-                body_rect = pygame.Rect(x + 1 + shake_x, y + 1 + shake_y, 
-                                      CELL_SIZE-2, CELL_SIZE-2)
-                pygame.draw.rect(self.screen, body_color, body_rect, border_radius=3)
-        
-        # Draw food with pulsing effect
+            trail_surf = self.sprite_cache.rounded_rect((CELL_SIZE-2, CELL_SIZE-2),
+                                                        Colors.NEON_GREEN, alpha)
+            self.screen.blit(trail_surf, (x + 1 + offset_x, y + 1 + offset_y))
+    
+    def render_alpha(self):
+        # How far the renderer is between the last move and the next one
+        if not self.interpolate or self.state != GameState.PLAYING:
+            return 1.0
+        return self.timestep.alpha(self.tick_interval())
+    
+    def tick_interval(self):
+        # Seconds between simulation moves at the current speed
+        return move_interval(self.engine.speed, self.max_move_rate)
+    
+    def draw_snake(self, offset_x, offset_y, cells=None):
+        self.draw_body(self.engine.snake, self.prev_head, self.prev_tail, offset_x, offset_y, cells)
+    
+    def draw_body(self, snake, prev_head, prev_tail, offset_x, offset_y, cells=None,
+                  tint=(0, 255, 0), head_color=Colors.NEON_GREEN):
+        # Draw snake with gradient effect; `cells` limits drawing to those segments
+        if cells is None:
+            segments = enumerate(snake)
+            draw_head = True
+        else:
+            front = dict(zip(islice(snake, GRADIENT_SEGMENTS), range(GRADIENT_SEGMENTS)))
+            segments = sorted((front.get(cell, GRADIENT_SEGMENTS), cell) for cell in cells)
+            draw_head = snake.head in cells
+        
+        # Between moves the head slides out of its previous cell and the tail retracts into the next
+        alpha = self.render_alpha()
+        if alpha < 1 and prev_tail != snake.tail:
+            x = (prev_tail[0] + (snake.tail[0] - prev_tail[0]) * alpha) * CELL_SIZE
+            y = (prev_tail[1] + (snake.tail[1] - prev_tail[1]) * alpha) * CELL_SIZE
+            intensity = max(50, 255 - (len(snake) - 1) * 10)
+            tail_color = tuple(c * intensity // 255 for c in tint)
+            tail_rect = pygame.Rect(x + 1 + offset_x, y + 1 + offset_y, CELL_SIZE-2, CELL_SIZE-2)
+            pygame.draw.rect(self.screen, tail_color, tail_rect, border_radius=3)
+        
+        for i, (col, row) in segments:
+            if i == 0:
+                continue
+            x, y = col * CELL_SIZE, row * CELL_SIZE
+            intensity = max(50, 255 - i * 10)
+            body_color = tuple(c * intensity // 255 for c in tint)
+            body_rect = pygame.Rect(x + 1 + offset_x, y + 1 + offset_y, 
+                                  CELL_SIZE-2, CELL_SIZE-2)
+            pygame.draw.rect(self.screen, body_color, body_rect, border_radius=3)
+        
+        # Head goes on top so it is not hidden by the segment it is leaving
+        if draw_head:
+            head = snake.head
+            x = int((prev_head[0] + (head[0] - prev_head[0]) * alpha) * CELL_SIZE)
+            y = int((prev_head[1] + (head[1] - prev_head[1]) * alpha) * CELL_SIZE)
+            head_rect = pygame.Rect(x + offset_x, y + offset_y, CELL_SIZE, CELL_SIZE)
+            self.draw_glowing_rect(self.screen, head_rect, head_color, 2)
+            # Eyes
+            pygame.draw.circle(self.screen, Colors.WHITE, 
+                             (x + 5 + offset_x, y + 5 + offset_y), 2)
+            pygame.draw.circle(self.screen, Colors.WHITE,
+                             (x + 15 + offset_x, y + 5 + offset_y), 2)
+    
+    def draw_food(self, offset_x, offset_y):
+        # Draw food with pulsing effect (no food once the board is full)
+        if self.engine.food is None:
+            return
         pulse_size = 2 + math.sin(self.food_pulse) * 1
-        food_color = Colors.GOLD if self.food_type == "special" else Colors.RED
-        food_rect = pygame.Rect(self.food_pos[0] - pulse_size + shake_x, 
-                               self.food_pos[1] - pulse_size + shake_y,
+        food_color = Colors.GOLD if self.engine.food_type == "special" else Colors.RED
+        food_x, food_y = self.engine.food[0] * CELL_SIZE, self.engine.food[1] * CELL_SIZE
+        food_rect = pygame.Rect(food_x - pulse_size + offset_x, 
+                               food_y - pulse_size + offset_y,
                                CELL_SIZE + pulse_size * 2, CELL_SIZE + pulse_size * 2)
         self.draw_glowing_rect(self.screen, food_rect, food_color, 3)
+    
+    def draw_particles(self, particle_sprites, offset_x, offset_y):
+        for x, y, radius, color, alpha in particle_sprites:
+            particle_surf = self.sprite_cache.circle(radius, color, alpha)
+            self.screen.blit(particle_surf, (x + offset_x, y + offset_y))
+    
+    def hud_stats(self):
+        # One value per HUD_LINES entry
+        return (self.engine.score, self.high_score, self.engine.level,
+                self.engine.speed, len(self.engine.snake))
+    
+    def update_hud(self):
+        # Start from the static sidebar layer and patch in only the stats that changed
+        base = self.sidebar_layer.get(self.screen.get_size())
+        if self.hud_base is not base:
+            self.hud_surface = base.copy()
+            self.hud_base = base
+            self.hud_values = [None] * len(self.HUD_LINES)
         
-        # Draw particles
-        for particle in self.particles:
-            alpha = int(255 * (particle.life / particle.max_life))
-            color = (*particle.color, alpha)
-            particle_surf = pygame.Surface((particle.size * 2, particle.size * 2), pygame.SRCALPHA)
-            pygame.draw.circle(particle_surf, color, 
-                             (int(particle.size), int(particle.size)), int(particle.size))
-            self.screen.blit(particle_surf, (particle.x + shake_x, particle.y + shake_y))
-        
-        # Sidebar
-        sidebar_rect = pygame.Rect(GAME_WIDTH, 0, SIDEBAR_WIDTH, WINDOW_HEIGHT)
-        pygame.draw.rect(self.screen, Colors.SIDEBAR_BG, sidebar_rect)
-        
-        # Stats
-        self.draw_neon_text("STATS", self.font_medium, Colors.NEON_BLUE, GAME_WIDTH + 20, 50)
-        self.draw_neon_text(f"Score: {self.score}", self.font_small, Colors.WHITE, 
-                           GAME_WIDTH + 20, 100, False)
-        self.draw_neon_text(f"High: {self.high_score}", self.font_small, Colors.GOLD,
-                           GAME_WIDTH + 20, 130, False)
-        self.draw_neon_text(f"Level: {self.level}", self.font_small, Colors.NEON_PINK,
-                           GAME_WIDTH + 20, 160, False)
-        self.draw_neon_text(f"Speed: {self.speed}", self.font_small, Colors.ORANGE,
-                           GAME_WIDTH + 20, 190, False)
-        self.draw_neon_text(f"Length: {len(self.snake)}", self.font_small, Colors.NEON_GREEN,
-                           GAME_WIDTH + 20, 220, False)
-        
-        # Controls
-        self.draw_neon_text("CONTROLS", self.font_medium, Colors.NEON_BLUE, 
-                           GAME_WIDTH + 20, 300)
-        controls = [
-            "WASD / Arrows - Move",
-            "ESC - Pause"
-        ]
-        for i, control in enumerate(controls):
-            self.draw_neon_text(control, self.font_small, Colors.GRAY,
-                               GAME_WIDTH + 20, 340 + i * 25, False)
+        values = self.hud_stats()
+        line_height = self.font_small.get_linesize()
+        self.hud_dirty = []
+        for i, value in enumerate(values):
+            if value == self.hud_values[i]:
+                continue
+            label, color, y = self.HUD_LINES[i]
+            line = pygame.Rect(0, y, SIDEBAR_WIDTH, line_height)
+            self.hud_surface.blit(base, line, line)
+            self.draw_neon_text(f"{label}: {value}", self.font_small, color,
+                               20, y, False, surface=self.hud_surface)
+            self.hud_values[i] = value
+            self.hud_dirty.append(line.move(GAME_WIDTH, 0))
+        return self.hud_surface
+    
+    def outcome(self):
+        # Final score and whether the game was won
+        return self.engine.score, self.engine.won
     
     def draw_game_over(self):
         # Semi-transparent overlay
@@ -453,14 +797,20 @@ class SnakeGame:
         self.screen.blit(overlay, (0, 0))
         
         # Game Over text
-        self.draw_neon_text("GAME OVER", self.font_large, Colors.RED,
-                           WINDOW_WIDTH//2 - 100, 250)
+        score, won = self.outcome()
+        if won:
+            width = self.font_large.size(self.WIN_TITLE)[0]
+            self.draw_neon_text(self.WIN_TITLE, self.font_large, Colors.NEON_GREEN,
+                               WINDOW_WIDTH//2 - width//2, 250)
+        else:
+            self.draw_neon_text("GAME OVER", self.font_large, Colors.RED,
+                               WINDOW_WIDTH//2 - 100, 250)
         
         # Final score
-        self.draw_neon_text(f"Final Score: {self.score}", self.font_medium, Colors.WHITE,
+        self.draw_neon_text(f"Final Score: {score}", self.font_medium, Colors.WHITE,
                            WINDOW_WIDTH//2 - 80, 320)
         
-        if self.score == self.high_score:
+        if score == self.high_score:
             self.draw_neon_text("NEW HIGH SCORE!", self.font_medium, Colors.GOLD,
                                WINDOW_WIDTH//2 - 90, 360)
         
@@ -470,6 +820,31 @@ class SnakeGame:
         self.draw_neon_text("ESC - Main Menu", self.font_small, Colors.LIGHT_GRAY,
                            WINDOW_WIDTH//2 - 70, 450)
     
+    def draw_high_scores(self):
+        self.screen.blit(self.menu_layer.get(self.screen.get_size()), (0, 0))
+        self.draw_neon_text("HIGH SCORES", self.font_large, Colors.GOLD,
+                           WINDOW_WIDTH//2 - 110, 80)
+        
+        # Straight from the in-memory leaderboard, no disk access
+        entries = self.scores.top(self.score_mode)
+        if not entries:
+            self.draw_neon_text("No scores yet", self.font_medium, Colors.LIGHT_GRAY,
+                               WINDOW_WIDTH//2 - 80, 200)
+        for i, entry in enumerate(entries):
+            color = Colors.NEON_GREEN if entry.player == self.player else Colors.WHITE
+            y = 160 + i * 40
+            self.draw_neon_text(f"{i + 1:>2}.", self.font_medium, Colors.NEON_PINK,
+                               WINDOW_WIDTH//2 - 220, y, False)
+            self.draw_neon_text(entry.player[:16], self.font_medium, color,
+                               WINDOW_WIDTH//2 - 160, y, False)
+            self.draw_neon_text(str(entry.score), self.font_medium, Colors.GOLD,
+                               WINDOW_WIDTH//2 + 140, y, False)
+        
+        self.draw_neon_text(f"Your best: {self.scores.best(self.player, self.score_mode)}", self.font_small,
+                           Colors.LIGHT_GRAY, WINDOW_WIDTH//2 - 60, 580)
+        self.draw_neon_text("ESC - Back", self.font_small, Colors.LIGHT_GRAY,
+                           WINDOW_WIDTH//2 - 45, 620)
+    
     def draw_paused(self):
         # Semi-transparent overlay
         overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
@@ -483,14 +858,61 @@ class SnakeGame:
         self.draw_neon_text("ESC - Resume", self.font_small, Colors.WHITE,
                            WINDOW_WIDTH//2 - 60, 360)
     
+    def draw_profiler_overlay(self):
+        # The numbers are rebuilt twice a second; in between the panel is just blitted
+        now = time.perf_counter()
+        if self.profiler_overlay is None or now - self.profiler_overlay_time > 0.5:
+            summary = self.profiler.rolling_summary()
+            lines = [f"{'phase':<16}{'p50':>7}{'p95':>7}{'p99':>7}  ms"]
+            for name, (p50, p95, p99) in summary.items():
+                lines.append(f"{name:<16}{p50:>7.2f}{p95:>7.2f}{p99:>7.2f}")
+            if self.profiler_font is None:
+                self.profiler_font = pygame.font.SysFont("monospace", 14)
+            font = self.profiler_font
+            line_height = font.get_linesize()
+            width = max(font.size(line)[0] for line in lines) + 16
+            panel = pygame.Surface((width, line_height * len(lines) + 12), pygame.SRCALPHA)
+            panel.fill((0, 0, 0, 190))
+            for i, line in enumerate(lines):
+                panel.blit(font.render(line, True, Colors.NEON_GREEN), (8, 6 + i * line_height))
+            self.profiler_overlay = panel
+            self.profiler_overlay_time = now
+        self.screen.blit(self.profiler_overlay, (10, 10))
+    
+    def sync_high_score(self):
+        # Pick up the stored high score once the leaderboard loads, and when other instances add to it
+        version = self.scores.version
+        if version != self.scores_version:
+            self.scores_version = version
+            self.high_score = max(self.high_score, self.scores.high_score(self.score_mode))
+    
+    def present(self):
+        if self.frame_dirty_rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.frame_dirty_rects)
+        self.frame_dirty_rects = None
+    
     def run(self):
         running = True
+        first_frame = True
         
         while running:
-            for event in pygame.event.get():
+            # Wall-clock time since the last frame drives the fixed-timestep simulation
+            dt = self.clock.tick(FPS) / 1000.0
+            
+            with self.profiler.section("event_pump"):
+                events = pygame.event.get()
+            
+            for event in events:
                 if event.type == pygame.QUIT:
                     running = False
                 
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    # Toggle the frame profiler overlay (and start timing if it was off)
+                    self.show_profiler = not self.show_profiler
+                    self.profiler.enabled = self.profiler.enabled or self.show_profiler
+                
                 elif self.state == GameState.MENU:
                     running = self.handle_menu_events(event)
                 
@@ -510,14 +932,25 @@ class SnakeGame:
                             self.start_new_game()
                         elif event.key == pygame.K_ESCAPE:
                             self.state = GameState.MENU
+                
+                elif self.state == GameState.HIGH_SCORES:
+                    if event.type == pygame.KEYDOWN:
+                        if event.key in [pygame.K_ESCAPE, pygame.K_h, pygame.K_q]:
+                            self.state = GameState.MENU
             
             # Update
-            if self.state == GameState.PLAYING:
-                self.update_game()
+            self.sync_high_score()
+            if self.state in self.LIVE_STATES:
+                with self.profiler.section("update_game"):
+                    self.update_game(dt)
             
-            # Draw
+            # Draw (the profiler overlay sits on top of everything, so it needs full frames)
+            if self.show_profiler:
+                self.needs_full_redraw = True
             if self.state == GameState.MENU:
                 self.draw_menu()
+            elif self.state == GameState.HIGH_SCORES:
+                self.draw_high_scores()
             elif self.state in [GameState.PLAYING, GameState.PAUSED, GameState.GAME_OVER]:
                 self.draw_game()
                 if self.state == GameState.PAUSED:
@@ -525,12 +958,340 @@ class SnakeGame:
                 elif self.state == GameState.GAME_OVER:
                     self.draw_game_over()
             
-            pygame.display.flip()
-            self.clock.tick(FPS)
+            if self.show_profiler:
+                self.draw_profiler_overlay()
+            
+            # Menus and overlays always cover the whole window
+            if self.state != GameState.PLAYING or self.show_profiler:
+                self.needs_full_redraw = True
+            
+            with self.profiler.section("display_flip"):
+                self.present()
+            self.profiler.end_frame()
+            
+            if first_frame:
+                first_frame = False
+                self.report_startup("first_frame")
+                self.audio.start()
+            elif self.warmup is not None and self.state == GameState.MENU:
+                # One warm-up step per idle menu frame keeps the animation smooth
+                if next(self.warmup, StopIteration) is StopIteration:
+                    self.warmup = None
+                    if self.startup_time:
+                        # Measurement mode: wait for audio, then quit
+                        self.audio.wait_ready(timeout=5.0)
+                        running = False
         
+        if self.profile_path:
+            self.profiler.export(self.profile_path)
+        self.scores.close()
+        self.audio.close()
         pygame.quit()
         sys.exit()
 
+class ArenaGame(SnakeGame):
+    """Arena mode: the player steers snake 0 against bots on a shared board."""
+    HUD_LINES = (
+        ("Score", Colors.WHITE, 100),
+        ("High", Colors.GOLD, 130),
+        ("Kills", Colors.NEON_PINK, 160),
+        ("Alive", Colors.ORANGE, 190),
+        ("Length", Colors.NEON_GREEN, 220),
+    )
+    WIN_TITLE = "LAST SNAKE STANDING!"
+    # Body tint and head glow per snake; the player keeps the classic green
+    SNAKE_COLORS = (
+        ((0, 255, 0), Colors.NEON_GREEN),
+        ((255, 20, 147), Colors.NEON_PINK),
+        ((0, 200, 255), Colors.NEON_BLUE),
+        ((255, 149, 0), Colors.ORANGE),
+        ((191, 90, 242), Colors.PURPLE),
+        ((255, 215, 0), Colors.GOLD),
+        ((229, 229, 234), Colors.WHITE),
+    )
+    
+    def __init__(self, bots=7, bot="greedy", world=ARENA_SIZE, arena=None, **kwargs):
+        super().__init__(world=world, **kwargs)
+        if arena is None:
+            names = ["player"] + [bot] * bots
+            arena = ArenaEngine(*self.world, snakes=bots + 1, names=names)
+        self.arena = arena
+        self.player_id = 0
+        self.bots = [None] + [BOTS[bot]] * bots
+        self.bot_rng = random.Random()
+        self.prev_cells = {}  # snake id -> (head, tail) before the last move
+        # Always drawn through the camera path, whatever the board size
+        self.camera_mode = True
+        self.dirty_rendering = False
+        self.score_mode = f"arena-{self.world[0]}x{self.world[1]}"
+    
+    @property
+    def player_snake(self):
+        return self.arena.snakes[self.player_id]
+    
+    def steer(self, direction):
+        self.input_queue.push(direction, self.player_snake.direction)
+    
+    def tick_interval(self):
+        return move_interval(START_SPEED)
+    
+    def camera_focus(self):
+        snake = self.player_snake
+        return snake.head, self.prev_cells.get(self.player_id, (snake.head,))[0]
+    
+    def start_new_game(self, seed=None):
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.state = GameState.PLAYING
+        self.arena.reset(seed)
+        self.input_queue.clear()
+        self.bot_rng.seed(seed ^ FX_SEED_SALT)
+        self.fx_rng.seed(seed ^ FX_SEED_SALT)
+        self.particles.reseed(seed ^ FX_SEED_SALT)
+        self.timestep.reset()
+        self.prev_cells = {snake.id: (snake.head, snake.tail) for snake in self.arena.snakes}
+        self.particles.clear()
+        self.trail_positions.clear()
+    
+    def tick(self):
+        arena = self.arena
+        player = self.player_snake
+        self.prev_cells = {snake.id: (snake.head, snake.tail) for snake in arena.alive}
+        head = player.head
+        self.trail_positions.append((head[0] * CELL_SIZE, head[1] * CELL_SIZE, 20))
+        self.trail_positions = [(x, y, life-1) for x, y, life in self.trail_positions if life > 0]
+        
+        self.step_arena()
+        
+        for snake_id, (col, row) in arena.eaten:
+            glow = self.snake_colors(snake_id)[1]
+            self.create_explosion_particles(col * CELL_SIZE, row * CELL_SIZE, glow)
+            if snake_id == self.player_id:
+                self.audio.play("eat")
+                self.high_score = max(self.high_score, player.score)
+        for snake in arena.died:
+            col, row = snake.head
+            self.particles.burst(col * CELL_SIZE + CELL_SIZE//2, row * CELL_SIZE + CELL_SIZE//2,
+                                 self.snake_colors(snake.id)[1], count=20, speed=(2, 8),
+                                 life=60, size=(2, 5))
+        
+        if player in arena.died or (player.alive and arena.finished):
+            self.game_over()
+            return False
+        return True
+    
+    def step_arena(self):
+        arena = self.arena
+        self.apply_input(lambda direction: arena.turn(self.player_id, direction))
+        actions = [None] * len(arena.snakes)
+        for snake in arena.alive:
+            if snake.id != self.player_id:
+                actions[snake.id] = self.bots[snake.id](arena, snake, self.bot_rng)
+        arena.step(actions)
+    
+    def game_over(self):
+        self.state = GameState.GAME_OVER
+        score, won = self.outcome()
+        self.audio.play("won" if won else "game_over")
+        if score > 0:
+            self.scores.submit(self.player, score, self.score_mode, seed=self.arena.seed)
+        self.screen_shake = 20
+    
+    def outcome(self):
+        player = self.player_snake
+        return player.score, player.alive and self.arena.finished
+    
+    def snake_colors(self, snake_id):
+        # Whichever snake the player steers gets the first (green) entry
+        return self.SNAKE_COLORS[(snake_id - self.player_id) % len(self.SNAKE_COLORS)]
+    
+    def hud_stats(self):
+        player = self.player_snake
+        return (player.score, self.high_score, player.kills, len(self.arena.alive), len(player))
+    
+    def draw_world_view(self, offset_x, offset_y, left, top, right, bottom):
+        # One scan of the grid under the viewport sorts visible cells into food and snakes
+        profiler = self.profiler
+        with profiler.section("draw_trail"):
+            self.draw_trail(offset_x, offset_y)
+        visible = {}
+        food = []
+        for owner, cell in self.arena.cells_in(left, top, right, bottom):
+            if owner >= 0:
+                visible.setdefault(owner, set()).add(cell)
+            else:
+                food.append(cell)
+        with profiler.section("draw_snake"):
+            for snake_id, cells in visible.items():
+                snake = self.arena.snakes[snake_id]
+                prev_head, prev_tail = self.prev_cells.get(snake_id, (snake.head, snake.tail))
+                tint, glow = self.snake_colors(snake_id)
+                self.draw_body(snake, prev_head, prev_tail, offset_x, offset_y, cells, tint, glow)
+        with profiler.section("draw_food"):
+            pulse_size = 2 + math.sin(self.food_pulse) * 1
+            for col, row in food:
+                food_rect = pygame.Rect(col * CELL_SIZE - pulse_size + offset_x,
+                                        row * CELL_SIZE - pulse_size + offset_y,
+                                        CELL_SIZE + pulse_size * 2, CELL_SIZE + pulse_size * 2)
+                self.draw_glowing_rect(self.screen, food_rect, Colors.RED, 3)
+
+class NetworkGame(ArenaGame):
+    """Thin client: draws a room run by ``netplay.py serve`` and sends only the turns."""
+    # The room keeps going on the server whatever the local screen shows
+    LIVE_STATES = (GameState.PLAYING, GameState.PAUSED, GameState.GAME_OVER)
+    
+    def __init__(self, client, **kwargs):
+        self.client = client
+        mirror = ArenaMirror(client.cols, client.rows)
+        # The server sends the room's snapshot right after the welcome
+        try:
+            snapshot = client.messages.get(timeout=SNAPSHOT_TIMEOUT)
+        except queue.Empty:
+            raise ConnectionError(f"no room snapshot within {SNAPSHOT_TIMEOUT} seconds") from None
+        if snapshot is None:
+            raise ConnectionError("the server closed the connection")
+        mirror.apply(snapshot)
+        super().__init__(bots=0, world=(client.cols, client.rows), arena=mirror, **kwargs)
+        self.player_id = client.snake_id
+        self.message = None
+        self.sent = None  # (timestamp, direction) of the turn waiting to show up in a delta
+        self.sent_deltas = 0
+    
+    def sync_high_score(self):
+        pass  # server games are not recorded locally, so there is no high score to show
+    
+    def steer(self, direction):
+        current = self.sent[1] if self.sent is not None else self.player_snake.direction
+        self.input_queue.push(direction, current)
+        self.send_next_turn()
+    
+    def send_next_turn(self):
+        # The server applies one turn per tick, so a press waits until the last one has shown up
+        if self.sent is None:
+            self.sent = self.input_queue.pop()
+            self.sent_deltas = 0
+            if self.sent is not None:
+                self.client.send_turn(self.sent[1])
+    
+    def tick_interval(self):
+        return 1.0 / self.client.tick_rate
+    
+    def start_new_game(self, seed=None):
+        # Rounds are started by the server; this only resumes following the room
+        self.state = GameState.PLAYING
+        self.timestep.reset()
+        self.input_queue.clear()
+        self.sent = None
+        self.prev_cells = {snake.id: (snake.head, snake.tail) for snake in self.arena.snakes}
+        self.particles.clear()
+        self.trail_positions.clear()
+    
+    def update_game(self, dt=1 / FPS):
+        # Moves come from the server; the timestep only measures time since the last one
+        self.timestep.add(dt)
+        with self.profiler.section("simulation"):
+            while True:
+                try:
+                    data = self.client.messages.get_nowait()
+                except queue.Empty:
+                    break
+                if data is None:
+                    print("Disconnected from the server", file=sys.stderr)
+                    pygame.event.post(pygame.event.Event(pygame.QUIT))
+                    break
+                if data[0] == MSG_SNAPSHOT:
+                    self.arena.apply(data)
+                    self.start_new_game()
+                elif data[0] == MSG_DELTA:
+                    self.message = data
+                    self.timestep.reset()
+                    self.tick()
+        self.update_effects()
+    
+    def step_arena(self):
+        self.arena.apply(self.message)
+        if self.sent is not None:
+            snake = self.player_snake
+            self.sent_deltas += 1
+            if snake.direction == self.sent[1]:
+                # Includes the round trip: this delta is when the player sees the turn
+                self.profiler.record("input_latency", time.perf_counter() - self.sent[0])
+                self.sent = None
+            elif not snake.alive or self.sent_deltas > 2:
+                self.sent = None  # rejected by the server
+        self.send_next_turn()
+    
+    def game_over(self):
+        self.state = GameState.GAME_OVER
+        score, won = self.outcome()
+        self.audio.play("won" if won else "game_over")
+        self.screen_shake = 20
+
+def parse_address(text):
+    host, _, port = text.rpartition(":")
+    try:
+        return host or "localhost", int(port)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected HOST:PORT, got {text!r}")
+
 if __name__ == "__main__":
-    game = SnakeGame()
+    parser = argparse.ArgumentParser(description="Elite Snake")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="update only changed screen regions (for low-power displays)")
+    parser.add_argument("--record", metavar="DIR",
+                        help="save a replay of every finished game to DIR")
+    parser.add_argument("--player", default=os.environ.get("USER", "PLAYER"),
+                        help="name recorded with your scores")
+    parser.add_argument("--scores", default=SCORES_PATH, metavar="PATH",
+                        help="score database (can be on a volume shared between instances)")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="time each frame phase and write p50/p95/p99 to PATH (.json or .csv) on exit")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="print time to first frame, audio and cache warm-up, then exit")
+    parser.add_argument("--world", type=parse_size, metavar="COLSxROWS",
+                        help="board size in cells; larger than 40x30 scrolls with the snake")
+    parser.add_argument("--arena", type=int, metavar="BOTS",
+                        help="play against BOTS computer snakes on a shared board (default 80x60)")
+    parser.add_argument("--arena-bot", default="greedy", choices=sorted(BOTS),
+                        help="strategy of the arena bots")
+    parser.add_argument("--connect", type=parse_address, metavar="HOST:PORT",
+                        help="join an arena room hosted by netplay.py serve")
+    parser.add_argument("--room", type=int, default=ANY_ROOM,
+                        help="room to join with --connect (default: the emptiest)")
+    parser.add_argument("--autopilot", action="store_true",
+                        help="let the built-in autopilot play the single-board game "
+                             "(scores are not recorded)")
+    parser.add_argument("--replay", metavar="FILE", help="watch a recorded replay")
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                        help="playback speed multiplier for --replay")
+    parser.add_argument("--max-move-rate", type=float, default=MAX_MOVE_RATE, metavar="MOVES",
+                        help="moves per second at the top speed level (default %(default)s; "
+                             "higher is for unattended runs, too fast to steer)")
+    args = parser.parse_args()
+    
+    replay = Replay.load(args.replay) if args.replay else None
+    options = dict(dirty_rects=args.dirty_rects, player=args.player, scores_path=args.scores,
+                   profile_path=args.profile, startup_time=args.startup_time)
+    if args.connect:
+        try:
+            client = NetClient(*args.connect, room=args.room)
+            game = NetworkGame(client, **options)
+        except OSError as e:
+            parser.exit(1, f"Could not join {args.connect[0]}:{args.connect[1]}: {e}\n")
+        game.start_new_game()
+    elif args.arena:
+        game = ArenaGame(bots=args.arena, bot=args.arena_bot, world=args.world or ARENA_SIZE,
+                         **options)
+    else:
+        world = (replay.cols, replay.rows) if replay is not None else args.world or BOARD_SIZE
+        if args.autopilot:
+            try:
+                hamiltonian_cycle(*world)
+            except ValueError as e:
+                parser.error(f"--autopilot: {e}")
+        game = SnakeGame(record_dir=args.record, replay=replay, replay_speed=args.replay_speed,
+                         world=world, autopilot=args.autopilot and replay is None,
+                         max_move_rate=args.max_move_rate, **options)
+    if replay is not None:
+        game.start_new_game()
     game.run()
\ No newline at end of file
@@ -0,0 +1,563 @@
+"""Networked arena: authoritative server, delta stream and load test.
+
+The server owns the ``ArenaEngine`` of every room and ticks all rooms from
+one asyncio task at a fixed rate. Clients send only direction changes. Each
+tick, a room encodes what changed once and writes the same bytes to every
+client in the room: new heads, popped tails, deaths and new food. Eaten
+food is implied by a head landing on it. Clients receive a full snapshot
+when they join and when a round restarts. ``ArenaMirror`` rebuilds the room
+from that stream, which is what ``main.py --connect`` draws.
+
+Every message on the wire is a little-endian uint32 length followed by the
+payload, whose first byte is the message type.
+
+    python netplay.py serve --port 7777 --rooms 50
+    python netplay.py loadtest --rooms 50,100,200 --clients 4
+    python main.py --connect localhost:7777
+"""
+import argparse
+import asyncio
+import json
+import queue
+import random
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+from array import array
+
+from arena import EMPTY, FOOD, BOTS, ArenaEngine, ArenaSnake
+from engine import (DIRECTION_INDEX, DIRECTIONS, NORMAL_POINTS, RIGHT, START_SPEED, is_reverse,
+                    moves_per_second)
+
+DEFAULT_PORT = 7777
+TICK_RATE = int(moves_per_second(START_SPEED))  # the single-player starting pace
+ROOM_SIZE = (80, 60)
+ROOM_SLOTS = 8
+RESTART_TICKS = TICK_RATE * 3  # pause between rounds
+MAX_CLIENT_BUFFER = 256 * 1024  # bytes queued for a client before it is dropped as too slow
+MAX_CLIENT_MESSAGE = 64
+ANY_ROOM = 0xFFFF
+NO_KILLER = 0xFFFF
+
+MSG_JOIN = 1
+MSG_TURN = 2
+MSG_WELCOME = 10
+MSG_SNAPSHOT = 11
+MSG_DELTA = 12
+MSG_FULL = 13
+
+FRAME = struct.Struct("<I")
+JOIN = struct.Struct("<BH")  # type, room (ANY_ROOM for the first with a free slot)
+TURN = struct.Struct("<BB")  # type, direction index
+WELCOME = struct.Struct("<BHHHHB")  # type, room, snake id, cols, rows, tick rate
+SNAPSHOT = struct.Struct("<BIH")  # type, tick, snakes; then each SNAKE + cells, then food
+SNAKE = struct.Struct("<HBIHI")  # id, alive, score, kills, length
+COUNT = struct.Struct("<I")
+# type, tick, heads, tails, deaths, new food; then head ids (H), head cells (I),
+# tail ids (H), dead ids (H), killer ids (H), new food cells (I)
+DELTA = struct.Struct("<BIHHHH")
+
+BIG_ENDIAN = sys.byteorder == "big"
+
+
+def frame(payload):
+    return FRAME.pack(len(payload)) + payload
+
+
+def pack_array(typecode, values):
+    data = array(typecode, values)
+    if BIG_ENDIAN:
+        data.byteswap()
+    return data.tobytes()
+
+
+def unpack_array(typecode, data, pos, count):
+    values = array(typecode)
+    end = pos + count * values.itemsize
+    values.frombytes(data[pos:end])
+    if BIG_ENDIAN:
+        values.byteswap()
+    return values, end
+
+
+def encode_snapshot(arena):
+    cols = arena.cols
+    parts = [SNAPSHOT.pack(MSG_SNAPSHOT, arena.ticks, len(arena.snakes))]
+    for snake in arena.snakes:
+        # Dead snakes keep their last cells so a client can still center on them
+        cells = [row * cols + col for col, row in snake.cells]
+        parts.append(SNAKE.pack(snake.id, snake.alive, snake.score, snake.kills, len(cells)))
+        parts.append(pack_array("I", cells))
+    parts.append(COUNT.pack(len(arena.food)))
+    parts.append(pack_array("I", (row * cols + col for col, row in arena.food)))
+    return frame(b"".join(parts))
+
+
+def encode_delta(tick, head_ids, head_cells, tail_ids, dead_ids, killer_ids, food_cells):
+    return frame(b"".join((
+        DELTA.pack(MSG_DELTA, tick, len(head_ids), len(tail_ids), len(dead_ids), len(food_cells)),
+        pack_array("H", head_ids), pack_array("I", head_cells), pack_array("H", tail_ids),
+        pack_array("H", dead_ids), pack_array("H", killer_ids), pack_array("I", food_cells),
+    )))
+
+
+class ArenaMirror(ArenaEngine):
+    """Client-side copy of a room, rebuilt from snapshots and advanced by deltas."""
+
+    def __init__(self, cols, rows):
+        super().__init__(cols, rows, snakes=0)
+
+    def reset(self, seed=None):
+        self.seed = seed
+        self.grid = array("i", [EMPTY]) * (self.cols * self.rows)
+        self.food = set()
+        self.ticks = 0
+        self.eaten = []
+        self.died = []
+        self.food_added = []
+        self.snakes = []
+        self.alive = []
+        return self
+
+    def apply(self, data):
+        # Returns the message type so callers can tell a new round from a tick
+        kind = data[0]
+        if kind == MSG_SNAPSHOT:
+            self.apply_snapshot(data)
+        elif kind == MSG_DELTA:
+            self.apply_delta(data)
+        return kind
+
+    def apply_snapshot(self, data):
+        self.reset()
+        cols, grid = self.cols, self.grid
+        _, self.ticks, count = SNAPSHOT.unpack_from(data)
+        pos = SNAPSHOT.size
+        for _ in range(count):
+            snake_id, alive, score, kills, length = SNAKE.unpack_from(data, pos)
+            cells, pos = unpack_array("I", data, pos + SNAKE.size, length)
+            snake = ArenaSnake(snake_id, f"snake{snake_id}", (0, 0), RIGHT)
+            snake.cells.clear()
+            snake.cells.extend((index % cols, index // cols) for index in cells)
+            snake.alive = bool(alive)
+            snake.score, snake.kills = score, kills
+            if snake.alive:
+                for index in cells:
+                    grid[index] = snake_id
+            self.snakes.append(snake)
+        (food_count,) = COUNT.unpack_from(data, pos)
+        food, pos = unpack_array("I", data, pos + COUNT.size, food_count)
+        for index in food:
+            grid[index] = FOOD
+            self.food.add((index % cols, index // cols))
+        self.snake_count = len(self.snakes)
+        self.alive = [snake for snake in self.snakes if snake.alive]
+
+    def apply_delta(self, data):
+        cols, grid, snakes = self.cols, self.grid, self.snakes
+        _, self.ticks, heads, tails, deaths, new_food = DELTA.unpack_from(data)
+        head_ids, pos = unpack_array("H", data, DELTA.size, heads)
+        head_cells, pos = unpack_array("I", data, pos, heads)
+        tail_ids, pos = unpack_array("H", data, pos, tails)
+        dead_ids, pos = unpack_array("H", data, pos, deaths)
+        killer_ids, pos = unpack_array("H", data, pos, deaths)
+        food_cells, pos = unpack_array("I", data, pos, new_food)
+
+        # Same order as ArenaEngine.step: moves, then deaths, then new food
+        self.eaten = []
+        for snake_id, index in zip(head_ids, head_cells):
+            snake = snakes[snake_id]
+            cell = (index % cols, index // cols)
+            if grid[index] == FOOD:
+                self.food.discard(cell)
+                snake.score += NORMAL_POINTS
+                self.eaten.append((snake_id, cell))
+            if snake.cells:
+                head = snake.cells[0]
+                snake.direction = (cell[0] - head[0], cell[1] - head[1])
+            snake.cells.appendleft(cell)
+            grid[index] = snake_id
+        for snake_id in tail_ids:
+            col, row = snakes[snake_id].cells.pop()
+            grid[row * cols + col] = EMPTY
+        self.died = []
+        for snake_id, killer in zip(dead_ids, killer_ids):
+            snake = snakes[snake_id]
+            snake.alive = False
+            snake.died_at = self.ticks
+            if killer != NO_KILLER:
+                snake.killed_by = killer
+                snakes[killer].kills += 1
+            for col, row in snake.cells:
+                grid[row * cols + col] = EMPTY
+            self.died.append(snake)
+        if self.died:
+            self.alive = [snake for snake in self.alive if snake.alive]
+        self.food_added = []
+        for index in food_cells:
+            cell = (index % cols, index // cols)
+            grid[index] = FOOD
+            self.food.add(cell)
+            self.food_added.append(cell)
+
+
+class Connection:
+    __slots__ = ("reader", "writer", "room", "snake_id")
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.room = None
+        self.snake_id = None
+
+
+class Room:
+    def __init__(self, room_id, cols, rows, slots, seed, bots=True):
+        self.id = room_id
+        self.seed = seed
+        self.round = 0
+        self.arena = ArenaEngine(cols, rows, slots, seed=seed)
+        self.rng = random.Random(seed)
+        self.bot = BOTS["greedy"] if bots else None
+        self.clients = []
+        self.players = {}  # snake id -> Connection
+        self.pending = {}  # snake id -> direction for the next tick
+        self.restart_in = None
+
+    def join(self, conn):
+        free = [snake.id for snake in self.arena.snakes if snake.id not in self.players]
+        if not free:
+            return None
+        # Prefer a snake that is still in the round
+        snake_id = min(free, key=lambda i: not self.arena.snakes[i].alive)
+        self.players[snake_id] = conn
+        self.clients.append(conn)
+        conn.room, conn.snake_id = self, snake_id
+        return snake_id
+
+    def leave(self, conn):
+        if conn in self.clients:
+            self.clients.remove(conn)
+            self.players.pop(conn.snake_id, None)
+            self.pending.pop(conn.snake_id, None)
+
+    def turn(self, snake_id, direction_index):
+        # Checked against the direction of the last tick, not the last accepted input,
+        # so two quick presses between ticks cannot fold the snake back onto itself
+        snake = self.arena.snakes[snake_id]
+        direction = DIRECTIONS[direction_index & 3]
+        if snake.alive and not is_reverse(direction, snake.direction):
+            self.pending[snake_id] = direction
+
+    def tick(self):
+        # Advance one move and return the bytes to broadcast (None when there is nothing to send)
+        if not self.clients:
+            return None
+        arena = self.arena
+        if self.restart_in is not None:
+            self.restart_in -= 1
+            if self.restart_in > 0:
+                return None
+            self.restart_in = None
+            self.round += 1
+            self.pending.clear()
+            arena.reset(self.seed + self.round)
+            return encode_snapshot(arena)
+
+        actions = [None] * len(arena.snakes)
+        for snake in arena.alive:
+            if snake.id in self.players:
+                actions[snake.id] = self.pending.pop(snake.id, None)
+            elif self.bot is not None:
+                actions[snake.id] = self.bot(arena, snake, self.rng)
+        before = [(snake, len(snake.cells)) for snake in arena.alive]
+        arena.step(actions)
+
+        cols = arena.cols
+        head_ids, head_cells, tail_ids = [], [], []
+        for snake, length in before:
+            if snake.alive:
+                col, row = snake.cells[0]
+                head_ids.append(snake.id)
+                head_cells.append(row * cols + col)
+                if len(snake.cells) == length:
+                    tail_ids.append(snake.id)
+        dead_ids = [snake.id for snake in arena.died]
+        killer_ids = [NO_KILLER if snake.killed_by is None else snake.killed_by for snake in arena.died]
+        food_cells = [row * cols + col for col, row in arena.food_added]
+        if arena.finished:
+            self.restart_in = RESTART_TICKS
+        return encode_delta(arena.ticks, head_ids, head_cells, tail_ids, dead_ids, killer_ids, food_cells)
+
+
+class GameServer:
+    def __init__(self, rooms=1, cols=ROOM_SIZE[0], rows=ROOM_SIZE[1], slots=ROOM_SLOTS,
+                 bots=True, tick_rate=TICK_RATE, seed=0):
+        self.rooms = [Room(i, cols, rows, slots, seed + i * 7919, bots) for i in range(rooms)]
+        self.tick_rate = tick_rate
+        self.ticks = 0
+        self.late_ticks = 0
+        self.tick_costs = array("d")
+        self.bytes_sent = 0
+        self.dropped_clients = 0
+        self.handlers = set()
+
+    async def read_frame(self, reader):
+        (length,) = FRAME.unpack(await reader.readexactly(FRAME.size))
+        if not 0 < length <= MAX_CLIENT_MESSAGE:
+            raise ConnectionError(f"bad message length {length}")
+        return await reader.readexactly(length)
+
+    def find_room(self, room_id):
+        if room_id != ANY_ROOM:
+            return self.rooms[room_id] if room_id < len(self.rooms) else None
+        return min(self.rooms, key=lambda room: len(room.clients))
+
+    async def handle_client(self, reader, writer):
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = Connection(reader, writer)
+        self.handlers.add(asyncio.current_task())
+        try:
+            message = await self.read_frame(reader)
+            if message[0] != MSG_JOIN:
+                return
+            room = self.find_room(JOIN.unpack(message)[1])
+            snake_id = room.join(conn) if room is not None else None
+            if snake_id is None:
+                writer.write(frame(bytes([MSG_FULL])))
+                return
+            arena = room.arena
+            writer.write(frame(WELCOME.pack(MSG_WELCOME, room.id, snake_id, arena.cols, arena.rows,
+                                            self.tick_rate)))
+            writer.write(encode_snapshot(arena))
+            while True:
+                message = await self.read_frame(reader)
+                if message[0] == MSG_TURN and len(message) == TURN.size:
+                    room.turn(snake_id, message[1])
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if conn.room is not None:
+                conn.room.leave(conn)
+            writer.close()
+            self.handlers.discard(asyncio.current_task())
+
+    def broadcast(self, room, data):
+        for conn in list(room.clients):
+            transport = conn.writer.transport
+            if transport.is_closing():
+                room.leave(conn)
+                continue
+            if transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                # A client that cannot keep up is dropped rather than buffered forever
+                room.leave(conn)
+                conn.writer.close()
+                self.dropped_clients += 1
+                continue
+            conn.writer.write(data)
+            self.bytes_sent += len(data)
+
+    async def tick_loop(self):
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / self.tick_rate
+        next_tick = loop.time()
+        while True:
+            # CPU time, so other processes on the core do not count against the server
+            start = time.thread_time()
+            for room in self.rooms:
+                data = room.tick()
+                if data is not None:
+                    self.broadcast(room, data)
+            self.tick_costs.append(time.thread_time() - start)
+            self.ticks += 1
+
+            next_tick += interval
+            delay = next_tick - loop.time()
+            if delay < 0:
+                # Overloaded: skip the backlog instead of bursting ticks to catch up
+                self.late_ticks += 1
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    def stats(self, wall, cpu):
+        costs = sorted(self.tick_costs)
+        return {
+            "rooms": len(self.rooms),
+            "clients": sum(len(room.clients) for room in self.rooms),
+            "ticks": self.ticks,
+            "tick_rate": self.tick_rate,
+            "mean_tick_ms": sum(costs) / len(costs) * 1e3 if costs else 0.0,
+            "p99_tick_ms": costs[len(costs) * 99 // 100] * 1e3 if costs else 0.0,
+            "late_ticks": self.late_ticks,
+            "cpu_util": cpu / wall if wall else 0.0,
+            "kb_out_per_s": self.bytes_sent / wall / 1024 if wall else 0.0,
+            "dropped_clients": self.dropped_clients,
+        }
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT, duration=None):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        print(f"listening on {host}:{port}", flush=True)
+        ticker = asyncio.create_task(self.tick_loop())
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            if duration is None:
+                await asyncio.Event().wait()
+            else:
+                await asyncio.sleep(duration)
+        finally:
+            ticker.cancel()
+            server.close()
+            # Closing the sockets ends every handler's read, so they finish on their own
+            for room in self.rooms:
+                for conn in list(room.clients):
+                    conn.writer.close()
+            if self.handlers:
+                await asyncio.wait(self.handlers, timeout=1.0)
+        return self.stats(time.perf_counter() - wall, time.process_time() - cpu)
+
+
+class NetClient:
+    """Blocking client for the pygame renderer; a thread queues incoming messages."""
+
+    def __init__(self, host, port=DEFAULT_PORT, room=ANY_ROOM):
+        self.sock = socket.create_connection((host, port), timeout=10)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.sendall(frame(JOIN.pack(MSG_JOIN, room)))
+        welcome = self._read_frame()
+        if welcome[0] == MSG_FULL:
+            raise ConnectionError("no free slot on the server")
+        _, self.room, self.snake_id, self.cols, self.rows, self.tick_rate = WELCOME.unpack(welcome)
+        self.sock.settimeout(None)
+        self.messages = queue.SimpleQueue()  # bytes, then None once disconnected
+        self._thread = threading.Thread(target=self._run, name="net-client", daemon=True)
+        self._thread.start()
+
+    def _read_exact(self, n):
+        data = bytearray()
+        while len(data) < n:
+            chunk = self.sock.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError("server closed the connection")
+            data += chunk
+        return bytes(data)
+
+    def _read_frame(self):
+        (length,) = FRAME.unpack(self._read_exact(FRAME.size))
+        return self._read_exact(length)
+
+    def _run(self):
+        try:
+            while True:
+                self.messages.put(self._read_frame())
+        except OSError:
+            pass
+        self.messages.put(None)
+
+    def send_turn(self, direction):
+        try:
+            self.sock.sendall(frame(TURN.pack(MSG_TURN, DIRECTION_INDEX[direction])))
+        except OSError:
+            pass
+
+    def close(self):
+        self.sock.close()
+
+
+async def simulated_client(host, port, deadline, rng, totals):
+    # Joins any room, reads everything it is sent and turns now and then
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(frame(JOIN.pack(MSG_JOIN, ANY_ROOM)))
+    try:
+        while time.perf_counter() < deadline:
+            header = await asyncio.wait_for(reader.readexactly(FRAME.size),
+                                            deadline - time.perf_counter())
+            (length,) = FRAME.unpack(header)
+            await reader.readexactly(length)
+            totals["messages"] += 1
+            if rng.random() < 0.2:
+                writer.write(frame(TURN.pack(MSG_TURN, rng.randrange(4))))
+    except (asyncio.IncompleteReadError, ConnectionError):
+        totals["disconnected"] += 1
+    except asyncio.TimeoutError:
+        pass  # deadline hit while the room was quiet between rounds
+    finally:
+        writer.close()
+
+
+async def run_clients(host, port, count, seconds, seed):
+    rng = random.Random(seed)
+    totals = {"messages": 0, "disconnected": 0}
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*(simulated_client(host, port, deadline, random.Random(rng.random()), totals)
+                           for _ in range(count)))
+    return totals
+
+
+def loadtest(room_counts, clients, seconds, port, host="127.0.0.1"):
+    # One server process per room count, driven by simulated clients from this process
+    print(f"{'rooms':>6}{'clients':>8}{'cpu':>7}{'tick ms':>9}{'p99 ms':>8}{'late':>6}"
+          f"{'KB/s':>9}{'est. rooms/core':>17}")
+    sustained = 0
+    for rooms in room_counts:
+        server = subprocess.Popen(
+            [sys.executable, __file__, "serve", "--host", host, "--port", str(port),
+             "--rooms", str(rooms), "--slots", str(clients), "--no-bots",
+             "--duration", str(seconds + 2), "--stats"],
+            stdout=subprocess.PIPE, text=True)
+        server.stdout.readline()  # "listening on ..."
+        totals = asyncio.run(run_clients(host, port, rooms * clients, seconds, rooms))
+        stats = json.loads(server.stdout.read().strip().splitlines()[-1])
+        server.wait()
+        # Capacity if the tick loop may use 80% of the core
+        estimate = rooms * 0.8 / stats["cpu_util"] if stats["cpu_util"] else float("inf")
+        late = stats["late_ticks"] / max(1, stats["ticks"])
+        print(f"{rooms:>6}{rooms * clients:>8}{stats['cpu_util']:>7.0%}{stats['mean_tick_ms']:>9.2f}"
+              f"{stats['p99_tick_ms']:>8.2f}{late:>6.0%}{stats['kb_out_per_s']:>9.0f}{estimate:>17.0f}")
+        if totals["disconnected"] or stats["dropped_clients"]:
+            print(f"       {totals['disconnected']} clients disconnected, "
+                  f"{stats['dropped_clients']} dropped by the server")
+        if late < 0.01 and stats["mean_tick_ms"] * stats["tick_rate"] < 800:
+            sustained = rooms
+    print(f"sustained {sustained} rooms of {clients} at {TICK_RATE} ticks/s")
+    return sustained
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Elite Snake arena server")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="host arena rooms")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--rooms", type=int, default=16)
+    serve.add_argument("--slots", type=int, default=ROOM_SLOTS, help="snakes per room")
+    serve.add_argument("--no-bots", action="store_true", help="leave unclaimed snakes idle")
+    serve.add_argument("--duration", type=float, help="stop after this many seconds")
+    serve.add_argument("--stats", action="store_true", help="print tick statistics as JSON on exit")
+    load = sub.add_parser("loadtest", help="measure how many rooms one server process sustains")
+    load.add_argument("--rooms", default="25,50,100,200", help="comma-separated room counts to try")
+    load.add_argument("--clients", type=int, default=4, help="simulated players per room")
+    load.add_argument("--seconds", type=float, default=5.0)
+    load.add_argument("--port", type=int, default=DEFAULT_PORT + 1)
+    args = parser.parse_args(argv)
+
+    if args.command == "loadtest":
+        loadtest([int(n) for n in args.rooms.split(",")], args.clients, args.seconds, args.port)
+        return 0
+    server = GameServer(args.rooms, slots=args.slots, bots=not args.no_bots)
+    try:
+        stats = asyncio.run(server.serve(args.host, args.port, args.duration))
+    except KeyboardInterrupt:
+        return 0
+    if args.stats:
+        print(json.dumps(stats), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
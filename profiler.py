@@ -0,0 +1,157 @@
+"""Frame-phase instrumentation.
+
+Wrap each phase of the frame in ``profiler.section(name)``; the profiler
+keeps a rolling window of recent timings per phase (for the on-screen
+p50/p95/p99 overlay) plus a log-bucketed histogram for the whole session,
+which ``export`` writes to JSON or CSV. When disabled, ``section`` returns
+a shared no-op context manager, so leaving the calls in costs next to
+nothing.
+"""
+import csv
+import json
+import math
+import time
+from array import array
+
+WINDOW = 600  # frames kept for the rolling percentiles (10 s at 60 FPS)
+BUCKETS_PER_OCTAVE = 8  # session histogram resolution, about 9% per bucket
+PERCENTILES = (50, 95, 99)
+
+
+class _NullSection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SECTION = _NullSection()
+
+
+class _Section:
+    __slots__ = ("stats", "start")
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.add(time.perf_counter() - self.start)
+        return False
+
+
+class PhaseStats:
+    """Timings of one phase: a rolling window and a session-long histogram."""
+
+    def __init__(self, window=WINDOW):
+        self.window = array("d", [0.0] * window)
+        self.filled = 0
+        self.pos = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = {}
+
+    def add(self, seconds):
+        self.window[self.pos] = seconds
+        self.pos = (self.pos + 1) % len(self.window)
+        if self.filled < len(self.window):
+            self.filled += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        # Microsecond log2 buckets; everything under 1us shares bucket 0
+        bucket = int(math.log2(seconds * 1e6) * BUCKETS_PER_OCTAVE) if seconds > 1e-6 else 0
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def rolling_percentiles(self):
+        samples = sorted(self.window[:self.filled])
+        if not samples:
+            return {p: 0.0 for p in PERCENTILES}
+        return {p: samples[min(len(samples) - 1, len(samples) * p // 100)] for p in PERCENTILES}
+
+    def session_percentiles(self):
+        result = {}
+        targets = [(p, self.count * p / 100) for p in PERCENTILES]
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            while targets and seen >= targets[0][1]:
+                # Report the upper edge of the bucket
+                result[targets.pop(0)[0]] = 2 ** ((bucket + 1) / BUCKETS_PER_OCTAVE) / 1e6
+        for p, _ in targets:
+            result[p] = self.max
+        return result
+
+
+class FrameProfiler:
+    def __init__(self, enabled=False, window=WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self.phases = {}
+        self._sections = {}
+        self._frame_start = None
+
+    def _stats(self, name):
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = PhaseStats(self.window)
+        return stats
+
+    def section(self, name):
+        if not self.enabled:
+            return NULL_SECTION
+        section = self._sections.get(name)
+        if section is None:
+            section = self._sections[name] = _Section(self._stats(name))
+        return section
+
+    def record(self, name, seconds):
+        # A sample measured elsewhere, such as input latency
+        if self.enabled:
+            self._stats(name).add(seconds)
+
+    def end_frame(self):
+        # Whole-frame time, measured between consecutive calls
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self._stats("frame").add(now - self._frame_start)
+        self._frame_start = now
+
+    def rolling_summary(self):
+        # name -> (p50, p95, p99) in milliseconds over the recent window
+        return {name: tuple(v * 1e3 for v in stats.rolling_percentiles().values())
+                for name, stats in self.phases.items()}
+
+    def session_summary(self):
+        summary = {}
+        for name, stats in self.phases.items():
+            percentiles = stats.session_percentiles()
+            summary[name] = {
+                "count": stats.count,
+                "mean_ms": stats.total / stats.count * 1e3 if stats.count else 0.0,
+                **{f"p{p}_ms": percentiles[p] * 1e3 for p in PERCENTILES},
+                "max_ms": stats.max * 1e3,
+            }
+        return summary
+
+    def export(self, path):
+        summary = self.session_summary()
+        if path.endswith(".csv"):
+            fields = ["phase", "count", "mean_ms"] + [f"p{p}_ms" for p in PERCENTILES] + ["max_ms"]
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=fields)
+                writer.writeheader()
+                for name, row in summary.items():
+                    writer.writerow({"phase": name, **row})
+        else:
+            with open(path, "w") as f:
+                json.dump(summary, f, indent=2)
@@ -0,0 +1,162 @@
+"""Pre-rendered surfaces for the neon effects.
+
+The glow, trail and particle effects all need small per-pixel-alpha
+surfaces. Building them on every frame means hundreds of allocations, so
+they are rendered once per (shape, size, color, alpha bucket) and kept in a
+bounded LRU cache. Backgrounds that never change between frames (gradient,
+grid, sidebar chrome) are kept as ``StaticLayer`` surfaces, and rendered
+text goes through ``TextCache``.
+"""
+from collections import OrderedDict
+
+import pygame
+
+# Alpha values are snapped to buckets of this width so fading effects reuse sprites
+ALPHA_BUCKET = 16
+
+# Neon text glow copies are drawn this many pixels off the main text
+TEXT_GLOW_OFFSET = 2
+
+
+def bucket_alpha(alpha):
+    alpha = max(0, min(255, int(alpha)))
+    return min(255, round(alpha / ALPHA_BUCKET) * ALPHA_BUCKET)
+
+
+def glow_padding(glow_size):
+    # Layer i grows by 2px per side and fades by 15 alpha; layers past alpha 0 are skipped
+    return 2 * (min(glow_size, 4) - 1) if glow_size > 0 else 0
+
+
+def render_glow_rect(size, color, glow_size):
+    width, height = size
+    pad = glow_padding(glow_size)
+    sprite = pygame.Surface((width + pad * 2, height + pad * 2), pygame.SRCALPHA)
+    for i in range(glow_size):
+        alpha = 50 - (i * 15)
+        if alpha <= 0:
+            continue
+        layer = pygame.Surface((width + i*4, height + i*4), pygame.SRCALPHA)
+        pygame.draw.rect(layer, (*color, alpha), layer.get_rect(), border_radius=5)
+        sprite.blit(layer, (pad - i*2, pad - i*2))
+    pygame.draw.rect(sprite, color, pygame.Rect(pad, pad, width, height), border_radius=5)
+    return sprite
+
+
+def render_rounded_rect(size, rgba, border_radius):
+    sprite = pygame.Surface(size, pygame.SRCALPHA)
+    pygame.draw.rect(sprite, rgba, sprite.get_rect(), border_radius=border_radius)
+    return sprite
+
+
+def render_circle(radius, rgba):
+    sprite = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+    pygame.draw.circle(sprite, rgba, (radius, radius), radius)
+    return sprite
+
+
+def render_neon_text(text, font, color, glow):
+    text_surf = font.render(text, True, color)
+    if not glow:
+        return text_surf
+
+    # One glow render reused for all four offsets, composited under the text
+    off = TEXT_GLOW_OFFSET
+    width, height = text_surf.get_size()
+    sprite = pygame.Surface((width + off * 2, height + off * 2), pygame.SRCALPHA)
+    glow_surf = font.render(text, True, (color[0]//3, color[1]//3, color[2]//3))
+    for dx, dy in [(off, off), (-off, -off), (off, -off), (-off, off)]:
+        sprite.blit(glow_surf, (off + dx, off + dy))
+    sprite.blit(text_surf, (off, off))
+    return sprite
+
+
+class SpriteCache:
+    """LRU cache of pre-rendered sprites.
+
+    ``max_size=0`` disables caching: every request renders a fresh surface,
+    which is how the game drew before and is kept for benchmarking.
+    """
+
+    def __init__(self, max_size=512):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._sprites = OrderedDict()
+
+    def __len__(self):
+        return len(self._sprites)
+
+    def clear(self):
+        self._sprites.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._sprites)}
+
+    def get(self, key, render, *args):
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self._sprites.move_to_end(key)
+            self.hits += 1
+            return sprite
+
+        self.misses += 1
+        sprite = render(*args)
+        if self.max_size > 0:
+            self._sprites[key] = sprite
+            if len(self._sprites) > self.max_size:
+                self._sprites.popitem(last=False)
+        return sprite
+
+    def glow_rect(self, size, color, glow_size):
+        return self.get(("glow_rect", size, color, glow_size),
+                        render_glow_rect, size, color, glow_size)
+
+    def rounded_rect(self, size, color, alpha, border_radius=3):
+        rgba = (*color, bucket_alpha(alpha))
+        return self.get(("rounded_rect", size, rgba, border_radius),
+                        render_rounded_rect, size, rgba, border_radius)
+
+    def circle(self, radius, color, alpha):
+        rgba = (*color, bucket_alpha(alpha))
+        return self.get(("circle", radius, rgba), render_circle, radius, rgba)
+
+
+class TextCache(SpriteCache):
+    """Rendered strings keyed by (text, font, color, glow).
+
+    Glowing text comes back with ``TEXT_GLOW_OFFSET`` pixels of padding on
+    every side; blit it that far up and left of the text position.
+    """
+
+    def __init__(self, max_size=256):
+        super().__init__(max_size)
+
+    def text(self, text, font, color, glow=True):
+        return self.get(("text", text, font, color, glow),
+                        render_neon_text, text, font, color, glow)
+
+
+class StaticLayer:
+    """Off-screen surface that is rebuilt only when its key changes.
+
+    The key is whatever the layer depends on, usually the window size.
+    ``invalidate`` forces a rebuild on the next ``get`` (e.g. after a
+    theme change).
+    """
+
+    def __init__(self, build):
+        self.build = build
+        self.key = None
+        self.surface = None
+        self.builds = 0
+
+    def get(self, key):
+        if self.surface is None or key != self.key:
+            self.surface = self.build()
+            self.key = key
+            self.builds += 1
+        return self.surface
+
+    def invalidate(self):
+        self.surface = None
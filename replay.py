@@ -0,0 +1,177 @@
+"""Compact replays of seeded games.
+
+A replay is the game seed plus the direction changes the player made,
+stored as ``(tick, direction)`` runs: the direction holds until the next
+change, so a whole game is usually a few hundred bytes. Re-simulating a
+replay only needs the headless engine, which makes verifying submitted
+scores cheap.
+
+    python replay.py verify replays/*.snkr
+    python replay.py info replays/run.snkr
+"""
+import argparse
+import struct
+import sys
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from engine import BOARD_COLS, BOARD_ROWS, DIRECTIONS, SnakeEngine, StepResult
+
+REPLAY_MAGIC = b"SNKR"
+REPLAY_VERSION = 3  # 3: speeds 11-15 rise evenly to MAX_MOVE_RATE, which shifts special food rolls
+# magic, version, seed, cols, rows, ticks, score, number of turns
+HEADER = struct.Struct("<4sBQHHIII")
+
+
+class ReplayError(ValueError):
+    pass
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    value = shift = 0
+    while True:
+        if pos >= len(data):
+            raise ReplayError("truncated replay")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+@dataclass
+class Replay:
+    seed: int
+    cols: int = BOARD_COLS
+    rows: int = BOARD_ROWS
+    ticks: int = 0
+    score: int = 0
+    turns: List[Tuple[int, int]] = field(default_factory=list)
+
+    @classmethod
+    def from_engine(cls, engine):
+        if engine.seed is None:
+            raise ReplayError("only games reset with an explicit seed can be replayed")
+        return cls(engine.seed, engine.cols, engine.rows, engine.ticks, engine.score,
+                   list(engine.turns))
+
+    def to_bytes(self):
+        out = bytearray(HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.seed, self.cols,
+                                    self.rows, self.ticks, self.score, len(self.turns)))
+        # Each change is one varint: ticks since the previous change, then 2 bits of direction
+        last = 0
+        for tick, direction in self.turns:
+            write_varint(out, ((tick - last) << 2) | direction)
+            last = tick
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < HEADER.size:
+            raise ReplayError("truncated replay header")
+        magic, version, seed, cols, rows, ticks, score, count = HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC:
+            raise ReplayError("not a replay file")
+        if version != REPLAY_VERSION:
+            raise ReplayError(f"unsupported replay version {version}")
+        turns = []
+        pos = HEADER.size
+        tick = 0
+        for _ in range(count):
+            value, pos = read_varint(data, pos)
+            tick += value >> 2
+            turns.append((tick, value & 3))
+        return cls(seed, cols, rows, ticks, score, turns)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class ReplayPlayer:
+    """Feeds a replay's direction changes into an engine tick by tick."""
+
+    def __init__(self, replay):
+        self.replay = replay
+        self.index = 0
+
+    def direction_for(self, tick):
+        # The direction change recorded for this tick, if any
+        turns = self.replay.turns
+        if self.index < len(turns) and turns[self.index][0] == tick:
+            self.index += 1
+            return DIRECTIONS[turns[self.index - 1][1]]
+        return None
+
+    @property
+    def finished(self):
+        return self.index >= len(self.replay.turns)
+
+
+def simulate(replay):
+    """Re-run a replay headlessly and return the finished engine."""
+    engine = SnakeEngine(replay.cols, replay.rows, seed=replay.seed)
+    step = engine.step
+    for tick, direction in replay.turns:
+        # Plain moves up to the next change, then the move that turns
+        while engine.ticks < tick:
+            if step() >= StepResult.DIED:
+                return engine
+        # Recorded directions were already validated when played, so apply them as-is
+        engine.direction = DIRECTIONS[direction]
+        if step() >= StepResult.DIED:
+            return engine
+    while engine.ticks < replay.ticks and engine.alive:
+        step()
+    return engine
+
+
+def verify(replay):
+    # A replay is valid if re-simulating it lands on the claimed score and length
+    engine = simulate(replay)
+    return engine.score == replay.score and engine.ticks == replay.ticks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and verify Elite Snake replays")
+    sub = parser.add_subparsers(dest="command", required=True)
+    verify_cmd = sub.add_parser("verify", help="re-simulate replays and check their scores")
+    verify_cmd.add_argument("paths", nargs="+")
+    info_cmd = sub.add_parser("info", help="print replay headers")
+    info_cmd.add_argument("paths", nargs="+")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for path in args.paths:
+        try:
+            replay = Replay.load(path)
+        except (OSError, ReplayError) as e:
+            print(f"{path}: error: {e}")
+            failed += 1
+            continue
+        if args.command == "info":
+            print(f"{path}: seed={replay.seed} board={replay.cols}x{replay.rows} "
+                  f"ticks={replay.ticks} score={replay.score} turns={len(replay.turns)}")
+        elif verify(replay):
+            print(f"{path}: ok (score {replay.score})")
+        else:
+            print(f"{path}: MISMATCH (claimed score {replay.score})")
+            failed += 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
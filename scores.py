@@ -0,0 +1,230 @@
+"""Persistent high scores shared between game instances.
+
+Scores live in a SQLite file, which gives atomic commits and file locking
+so several kiosks can write to one shared volume. The game never touches
+the disk from its own thread: ``submit`` updates an in-memory leaderboard
+immediately and queues the score, and a background writer flushes queued
+scores in batches (one transaction each) and refreshes the leaderboard
+with what other instances have written.
+
+Opening the database happens on the writer thread too, since it can wait
+on another instance's lock. Until it is open the leaderboard is empty;
+``version`` goes up each time it is reloaded from disk. Each player's best
+score per mode is kept in its own table, updated as scores are written,
+and a refresh is skipped when no other connection has committed since the
+last one.
+"""
+import os
+import sqlite3
+import sys
+import threading
+import time
+from bisect import insort
+from dataclasses import dataclass, field
+from typing import Optional
+
+DEFAULT_PATH = "snake_scores.db"
+LEGACY_PATH = "snake_highscore.txt"
+DEFAULT_MODE = "classic"
+TOP_N = 10
+FLUSH_INTERVAL = 5.0  # seconds between background flushes
+LOCK_TIMEOUT = 30.0  # seconds to wait for another instance's write lock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    seed INTEGER,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_mode ON scores (mode, score DESC);
+CREATE TABLE IF NOT EXISTS bests (
+    player TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    PRIMARY KEY (player, mode)
+);
+"""
+
+
+@dataclass(order=True, frozen=True)
+class ScoreEntry:
+    # Sorts best first: highest score, then earliest
+    sort_key: tuple = field(init=False, repr=False)
+    player: str = field(compare=False)
+    mode: str = field(compare=False)
+    score: int = field(compare=False)
+    created: float = field(compare=False)
+    seed: Optional[int] = field(default=None, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "sort_key", (-self.score, self.created))
+
+
+class ScoreStore:
+    def __init__(self, path=DEFAULT_PATH, top_n=TOP_N, flush_interval=FLUSH_INTERVAL,
+                 legacy_path=LEGACY_PATH):
+        self.path = path
+        self.top_n = top_n
+        self.flush_interval = flush_interval
+        self.legacy_path = legacy_path
+        self.version = 0
+        self._lock = threading.Lock()
+        self._pending = []
+        self._leaderboards = {}
+        self._bests = {}
+        self._db = None
+        self._data_version = None
+
+        self._stop = threading.Event()
+        self._writer = threading.Thread(target=self._run_writer, name="score-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        # Autocommit mode so transactions are explicit; check_same_thread off for the writer
+        db = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT, isolation_level=None,
+                             check_same_thread=False)
+        try:
+            db.executescript(SCHEMA)
+            if not db.execute("SELECT 1 FROM bests LIMIT 1").fetchone():
+                # Databases from before the bests table: fill it once from the history
+                db.execute("INSERT OR IGNORE INTO bests (player, mode, score) "
+                           "SELECT player, mode, MAX(score) FROM scores GROUP BY player, mode")
+        except BaseException:
+            db.close()
+            raise
+        return db
+
+    def _open(self):
+        try:
+            self._db = self._connect()
+            self._import_legacy(self.legacy_path)
+            self._refresh()
+        except sqlite3.Error as e:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            print(f"Could not open scores: {e}", file=sys.stderr)
+            return False
+        return True
+
+    def _import_legacy(self, legacy_path):
+        # One-time migration of the old single-integer high score file
+        if not legacy_path or not os.path.exists(legacy_path):
+            return
+        try:
+            with open(legacy_path) as f:
+                score = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return
+        if score > 0 and not self._db.execute("SELECT 1 FROM scores LIMIT 1").fetchone():
+            self._write([ScoreEntry("PLAYER", DEFAULT_MODE, score, time.time())])
+
+    def _write(self, entries):
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.executemany(
+                "INSERT INTO scores (player, mode, score, seed, created) VALUES (?, ?, ?, ?, ?)",
+                [(e.player, e.mode, e.score, e.seed, e.created) for e in entries])
+            db.executemany(
+                "INSERT INTO bests (player, mode, score) VALUES (?, ?, ?) "
+                "ON CONFLICT (player, mode) DO UPDATE SET score = MAX(score, excluded.score)",
+                [(e.player, e.mode, e.score) for e in entries])
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _refresh(self):
+        # Rebuild the in-memory index from the database (picks up other instances' scores).
+        # Our own writes are indexed already, so only another connection's commit needs it.
+        db = self._db
+        data_version = db.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        leaderboards = {}
+        modes = [row[0] for row in db.execute("SELECT DISTINCT mode FROM bests")]
+        for mode in modes:
+            rows = db.execute(
+                "SELECT player, mode, score, created, seed FROM scores WHERE mode = ? "
+                "ORDER BY score DESC, created ASC LIMIT ?", (mode, self.top_n))
+            leaderboards[mode] = [ScoreEntry(*row) for row in rows]
+        bests = {(player, mode): score for player, mode, score in db.execute(
+            "SELECT player, mode, score FROM bests")}
+
+        with self._lock:
+            # Scores still waiting to be flushed must stay visible
+            for entry in self._pending:
+                self._index(entry, leaderboards, bests)
+            self._leaderboards = leaderboards
+            self._bests = bests
+            self.version += 1
+        self._data_version = data_version
+
+    def _index(self, entry, leaderboards, bests):
+        board = leaderboards.setdefault(entry.mode, [])
+        if entry not in board:
+            insort(board, entry)
+            del board[self.top_n:]
+        key = (entry.player, entry.mode)
+        if entry.score > bests.get(key, 0):
+            bests[key] = entry.score
+
+    def submit(self, player, score, mode=DEFAULT_MODE, seed=None):
+        entry = ScoreEntry(player, mode, score, time.time(), seed)
+        with self._lock:
+            self._pending.append(entry)
+            self._index(entry, self._leaderboards, self._bests)
+        return entry
+
+    def flush(self):
+        if self._db is None:
+            return False
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            try:
+                self._write(batch)
+            except sqlite3.Error as e:
+                # Keep the batch for the next round (e.g. the shared volume is busy)
+                with self._lock:
+                    self._pending[:0] = batch
+                print(f"Could not save scores: {e}", file=sys.stderr)
+                return False
+        try:
+            self._refresh()
+        except sqlite3.Error as e:
+            print(f"Could not read scores: {e}", file=sys.stderr)
+        return True
+
+    def _run_writer(self):
+        while not self._open():
+            if self._stop.wait(self.flush_interval):
+                return
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        self._writer.join()
+        # Scores submitted before the database ever opened get one last try
+        if self._db is None and (not self._pending or not self._open()):
+            return
+        self.flush()
+        self._db.close()
+
+    def top(self, mode=DEFAULT_MODE):
+        with self._lock:
+            return list(self._leaderboards.get(mode, ()))
+
+    def best(self, player, mode=DEFAULT_MODE):
+        with self._lock:
+            return self._bests.get((player, mode), 0)
+
+    def high_score(self, mode=DEFAULT_MODE):
+        with self._lock:
+            board = self._leaderboards.get(mode)
+            return board[0].score if board else 0
@@ -0,0 +1,391 @@
+"""Reinforcement-learning environments over the headless engine.
+
+``SnakeEnv`` follows the Gymnasium API (``reset``/``step``/``render``/
+``close``) and subclasses ``gymnasium.Env`` with matching spaces when
+Gymnasium is installed. ``BatchSnakeEnv`` steps many boards at once on
+``BatchSnakeEngine``, in the style of a vector env.
+
+Actions index ``engine.DIRECTIONS`` (0 up, 1 right, 2 down, 3 left); as
+with the keyboard, reversing is ignored. The reward is the score gained
+over ``NORMAL_POINTS`` (1 for food, 5 for special food), and dying costs
+``REWARD_DEATH``. A game is truncated after ``max_idle_steps`` moves without
+eating.
+
+Observation types:
+
+- ``grid``: uint8 ``(4, rows, cols)``; channels are body, head, food and
+  special food, each 0 or 1.
+- ``features``: float32 ``(15,)``; see ``FEATURE_NAMES``.
+- ``pixels``: uint8 ``(rows * scale, cols * scale, 3)`` RGB, drawn on an
+  offscreen surface that shares memory with the buffer.
+
+Observations are written in place: each step updates only the cells that
+changed, in buffers allocated once. The returned array is that buffer, so
+copy it to keep an observation past the next step. Unless the observation
+is ``pixels`` or a ``render_mode`` is set, nothing is drawn.
+
+``python snake_env.py`` measures steps per second:
+
+    python snake_env.py --obs grid features pixels --batch 256
+"""
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+import pygame
+
+from engine import (BOARD_COLS, BOARD_ROWS, DIRECTION_INDEX, DIRECTIONS, NORMAL_POINTS,
+                    BatchSnakeEngine, SnakeEngine, StepResult)
+
+try:
+    import gymnasium as gym
+    from gymnasium import spaces
+except ImportError:  # the environments work without Gymnasium; only the spaces need it
+    gym = spaces = None
+
+OBS_TYPES = ("grid", "features", "pixels")
+GRID_CHANNELS = 4  # body, head, food, special food
+FEATURE_NAMES = (
+    "danger_ahead", "danger_right", "danger_left",
+    "dir_up", "dir_right", "dir_down", "dir_left",
+    "food_up", "food_right", "food_down", "food_left",
+    "food_dx", "food_dy",  # signed offset from the head, as a fraction of the board
+    "length",  # share of the board covered
+    "special_food",
+)
+PIXEL_SCALE = 2  # pixels per cell in the pixels observation (the game draws 20)
+REWARD_DEATH = -1.0
+RENDER_FPS = 15
+
+# Pixel colors, as on the game screen
+BACKGROUND = (25, 25, 35)
+BODY = (0, 200, 0)
+HEAD = (57, 255, 20)
+FOOD = (255, 69, 58)
+SPECIAL_FOOD = (255, 215, 0)
+
+ENDED = (StepResult.DIED, StepResult.WON)
+
+
+class SnakeEnv(gym.Env if gym is not None else object):
+    """One board with the game's rules."""
+    metadata = {"render_modes": ["human", "rgb_array"], "render_fps": RENDER_FPS}
+
+    def __init__(self, obs_type="grid", cols=BOARD_COLS, rows=BOARD_ROWS, render_mode=None,
+                 pixel_scale=PIXEL_SCALE, max_idle_steps=None):
+        if obs_type not in OBS_TYPES:
+            raise ValueError(f"obs_type must be one of {', '.join(OBS_TYPES)}, not {obs_type!r}")
+        if render_mode is not None and render_mode not in self.metadata["render_modes"]:
+            raise ValueError(f"unsupported render_mode {render_mode!r}")
+        self.obs_type = obs_type
+        self.render_mode = render_mode
+        self.cols = cols
+        self.rows = rows
+        self.scale = pixel_scale
+        self.max_idle_steps = max_idle_steps or cols * rows
+        self.engine = SnakeEngine(cols, rows)
+        self.rng = random.Random()
+        self.idle = 0
+        self.info = {"score": 0, "length": 1, "won": False}
+
+        self.grid = np.zeros((GRID_CHANNELS, rows, cols), dtype=np.uint8)
+        self.features = np.zeros(len(FEATURE_NAMES), dtype=np.float32)
+        self.pixels = None
+        self.surface = None
+        if obs_type == "pixels" or render_mode is not None:
+            self.pixels = np.zeros((rows * pixel_scale, cols * pixel_scale, 3), dtype=np.uint8)
+            # Drawing on this surface writes straight into self.pixels
+            self.surface = pygame.image.frombuffer(self.pixels, (cols * pixel_scale,
+                                                                 rows * pixel_scale), "RGB")
+        self.observation = {"grid": self.grid, "features": self.features,
+                            "pixels": self.pixels}[obs_type]
+        self.window = None
+        self.clock = None
+
+        if spaces is not None:
+            self.action_space = spaces.Discrete(len(DIRECTIONS))
+            if obs_type == "features":
+                self.observation_space = spaces.Box(-1.0, 1.0, self.features.shape, np.float32)
+            else:
+                high = 255 if obs_type == "pixels" else 1
+                self.observation_space = spaces.Box(0, high, self.observation.shape, np.uint8)
+
+    def reset(self, seed=None, options=None):
+        # Without a seed, games follow on from the last seeded reset
+        if seed is None:
+            seed = self.rng.getrandbits(32)
+        else:
+            self.rng.seed(seed)
+        engine = self.engine.reset(seed)
+        self.idle = 0
+        if self.obs_type == "grid":
+            self.grid.fill(0)
+            for col, row in engine.snake:
+                self.grid[0, row, col] = 1
+            self._place_grid(engine.head, engine.food, None)
+        if self.surface is not None:
+            self.surface.fill(BACKGROUND)
+            for cell in engine.snake:
+                self._fill(cell, BODY)
+            self._place_pixels(engine.head)
+        if self.obs_type == "features":
+            self._write_features()
+        if self.render_mode == "human":
+            self.render()
+        return self.observation, self._update_info()
+
+    def step(self, action):
+        engine = self.engine
+        head, tail, food = engine.head, engine.snake.tail, engine.food
+        score = engine.score
+        result = engine.step(DIRECTIONS[action])
+
+        if result == StepResult.DIED:
+            reward = REWARD_DEATH  # the engine does not move a snake that dies
+        else:
+            reward = (engine.score - score) / NORMAL_POINTS
+            moved_tail = tail if engine.snake.tail != tail else None
+            if self.obs_type == "grid":
+                grid = self.grid
+                grid[0, engine.head[1], engine.head[0]] = 1
+                if moved_tail is not None:
+                    grid[0, tail[1], tail[0]] = 0
+                self._place_grid(engine.head, engine.food, (head, food))
+            if self.surface is not None:
+                self._fill(head, BODY)
+                if moved_tail is not None:
+                    self._fill(tail, BACKGROUND)  # after the old head: they match at length 1
+                self._place_pixels(engine.head)
+            if self.obs_type == "features":
+                self._write_features()
+        self.idle = 0 if result in (StepResult.ATE, StepResult.WON) else self.idle + 1
+        terminated = result in ENDED
+        truncated = not terminated and self.idle >= self.max_idle_steps
+        if self.render_mode == "human":
+            self.render()
+        return self.observation, reward, terminated, truncated, self._update_info()
+
+    def _place_grid(self, head, food, previous):
+        grid = self.grid
+        if previous is not None:
+            old_head, old_food = previous
+            grid[1, old_head[1], old_head[0]] = 0
+            if old_food is not None:
+                grid[2:, old_food[1], old_food[0]] = 0
+        grid[1, head[1], head[0]] = 1
+        if food is not None:
+            grid[2, food[1], food[0]] = 1
+            grid[3, food[1], food[0]] = self.engine.food_type == "special"
+
+    def _place_pixels(self, head):
+        # Food only moves when eaten, and then the head covers its old cell
+        self._fill(head, HEAD)
+        food = self.engine.food
+        if food is not None:
+            self._fill(food, SPECIAL_FOOD if self.engine.food_type == "special" else FOOD)
+
+    def _fill(self, cell, color):
+        scale = self.scale
+        self.surface.fill(color, (cell[0] * scale, cell[1] * scale, scale, scale))
+
+    def _blocked(self, col, row):
+        return not (0 <= col < self.cols and 0 <= row < self.rows) or self.engine.snake.occupied((col, row))
+
+    def _write_features(self):
+        engine, f = self.engine, self.features
+        (col, row), (dx, dy) = engine.head, engine.direction
+        f[0] = self._blocked(col + dx, row + dy)
+        f[1] = self._blocked(col - dy, row + dx)  # clockwise, as rows grow downwards
+        f[2] = self._blocked(col + dy, row - dx)
+        f[3:7] = 0
+        f[3 + DIRECTION_INDEX[engine.direction]] = 1
+        food = engine.food
+        if food is None:
+            f[7:13] = 0
+        else:
+            f[7] = food[1] < row
+            f[8] = food[0] > col
+            f[9] = food[1] > row
+            f[10] = food[0] < col
+            f[11] = (food[0] - col) / self.cols
+            f[12] = (food[1] - row) / self.rows
+        f[13] = len(engine.snake) / (self.cols * self.rows)
+        f[14] = engine.food_type == "special"
+
+    def _update_info(self):
+        info, engine = self.info, self.engine
+        info["score"] = engine.score
+        info["length"] = len(engine.snake)
+        info["won"] = engine.won
+        return info
+
+    def render(self):
+        if self.render_mode == "rgb_array":
+            return self.pixels.copy()
+        if self.render_mode == "human":
+            if self.window is None:
+                pygame.display.init()
+                self.window = pygame.display.set_mode((self.cols * 20, self.rows * 20))
+                pygame.display.set_caption("Elite Snake - environment")
+                self.clock = pygame.time.Clock()
+            pygame.event.pump()
+            pygame.transform.scale(self.surface, self.window.get_size(), self.window)
+            pygame.display.flip()
+            self.clock.tick(self.metadata["render_fps"])
+        return None
+
+    def close(self):
+        if self.window is not None:
+            pygame.display.quit()
+            self.window = None
+
+
+class BatchSnakeEnv:
+    """``n`` boards stepped together on ``BatchSnakeEngine``.
+
+    ``step(actions)`` takes one action per board and returns arrays of
+    observations, rewards and terminated/truncated flags. A board that
+    ends is reset within the same step, so its observation is already the
+    next game's first one. Supports the ``grid`` and ``features`` observations,
+    with a leading board axis. The observation, reward and flag buffers are
+    allocated once; the NumPy temporaries in between are O(n) per step.
+    """
+
+    def __init__(self, n, obs_type="grid", cols=BOARD_COLS, rows=BOARD_ROWS, max_idle_steps=None,
+                 seed=None):
+        if obs_type not in ("grid", "features"):
+            raise ValueError(f"BatchSnakeEnv supports grid and features observations, not {obs_type!r}")
+        self.n = n
+        self.obs_type = obs_type
+        self.cols = cols
+        self.rows = rows
+        self.max_idle_steps = max_idle_steps or cols * rows
+        self.engine = BatchSnakeEngine(n, cols, rows, seed=seed)
+        self.boards = np.arange(n)
+        self.idle = np.zeros(n, dtype=np.int64)
+        self.last_score = np.zeros(n, dtype=np.int64)
+        self.rewards = np.zeros(n, dtype=np.float32)
+        self.terminated = np.zeros(n, dtype=bool)
+        self.truncated = np.zeros(n, dtype=bool)
+        self.grid = np.zeros((n, GRID_CHANNELS, rows, cols), dtype=np.uint8)
+        self.features = np.zeros((n, len(FEATURE_NAMES)), dtype=np.float32)
+        self.observation = self.grid if obs_type == "grid" else self.features
+        self.heads = np.zeros(n, dtype=np.int64)
+        self.info = {"score": self.last_score}
+
+    def reset(self, seed=None, options=None):
+        if seed is not None:
+            self.engine.rng = np.random.default_rng(seed)
+        self.engine.reset()
+        self.idle.fill(0)
+        self._write_observation()
+        np.copyto(self.last_score, self.engine.score)
+        return self.observation, self.info
+
+    def step(self, actions):
+        engine = self.engine
+        result = engine.step(actions)
+        np.subtract(engine.score, self.last_score, out=self.rewards, casting="unsafe")
+        self.rewards /= NORMAL_POINTS
+        died = result == StepResult.DIED
+        self.rewards[died] = REWARD_DEATH
+        np.greater_equal(result, StepResult.DIED, out=self.terminated)
+
+        self.idle += 1
+        self.idle[result == StepResult.ATE] = 0
+        np.greater_equal(self.idle, self.max_idle_steps, out=self.truncated)
+        self.truncated &= ~self.terminated
+        done = self.terminated | self.truncated
+        if done.any():
+            engine.reset(done)
+            self.idle[done] = 0
+        self._write_observation()
+        np.copyto(self.last_score, engine.score)
+        return self.observation, self.rewards, self.terminated, self.truncated, self.info
+
+    def _write_observation(self):
+        engine = self.engine
+        np.multiply(engine.head_y, self.cols, out=self.heads)
+        self.heads += engine.head_x
+        if self.obs_type == "grid":
+            flat = self.grid.reshape(self.n, GRID_CHANNELS, -1)
+            np.copyto(flat[:, 0], engine.occupied, casting="unsafe")
+            flat[:, 1:].fill(0)
+            flat[self.boards, 1, self.heads] = 1
+            flat[self.boards, 2, engine.food] = 1
+            flat[self.boards, 3, engine.food] = engine.food_special
+        else:
+            self._write_features()
+
+    def _blocked(self, cols, rows):
+        inside = (cols >= 0) & (cols < self.cols) & (rows >= 0) & (rows < self.rows)
+        index = np.where(inside, rows * self.cols + cols, 0)
+        return ~inside | self.engine.occupied[self.boards, index]
+
+    def _write_features(self):
+        engine, f = self.engine, self.features
+        col, row = engine.head_x, engine.head_y
+        move = engine.directions[engine.action]
+        dx, dy = move[:, 0], move[:, 1]
+        f[:, 0] = self._blocked(col + dx, row + dy)
+        f[:, 1] = self._blocked(col - dy, row + dx)
+        f[:, 2] = self._blocked(col + dy, row - dx)
+        f[:, 3:7] = 0
+        f[self.boards, 3 + engine.action] = 1
+        food_col, food_row = engine.food % self.cols, engine.food // self.cols
+        f[:, 7] = food_row < row
+        f[:, 8] = food_col > col
+        f[:, 9] = food_row > row
+        f[:, 10] = food_col < col
+        f[:, 11] = (food_col - col) / self.cols
+        f[:, 12] = (food_row - row) / self.rows
+        f[:, 13] = engine.length / (self.cols * self.rows)
+        f[:, 14] = engine.food_special
+
+
+def measure(env, steps, rng):
+    # Seconds per step with random actions (per board step for a BatchSnakeEnv)
+    batch = getattr(env, "n", None)
+    env.reset(seed=0)
+    if batch is None:
+        actions = [rng.randrange(len(DIRECTIONS)) for _ in range(steps)]
+        start = time.perf_counter()
+        for action in actions:
+            _, _, terminated, truncated, _ = env.step(action)
+            if terminated or truncated:
+                env.reset()
+        return (time.perf_counter() - start) / steps
+    calls = max(1, steps // batch)
+    actions = np.random.default_rng(rng.getrandbits(32)).integers(0, len(DIRECTIONS), (calls, batch))
+    start = time.perf_counter()
+    for row in actions:
+        env.step(row)
+    return (time.perf_counter() - start) / (calls * batch)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Environment throughput with random actions")
+    parser.add_argument("--obs", nargs="+", choices=OBS_TYPES, default=list(OBS_TYPES))
+    parser.add_argument("--steps", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, help="also time a BatchSnakeEnv with this many boards")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    for obs_type in args.obs:
+        seconds = measure(SnakeEnv(obs_type), args.steps, rng)
+        print(f"SnakeEnv {obs_type:<9}{seconds * 1e6:8.2f} us/step {1 / seconds:>12,.0f} steps/s")
+    if args.batch:
+        for obs_type in args.obs:
+            if obs_type == "pixels":
+                continue
+            seconds = measure(BatchSnakeEnv(args.batch, obs_type), args.steps, rng)
+            print(f"BatchSnakeEnv({args.batch}) {obs_type:<9}{seconds * 1e6:8.2f} us/step "
+                  f"{1 / seconds:>12,.0f} steps/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
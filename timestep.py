@@ -0,0 +1,46 @@
+"""Fixed-timestep accumulator.
+
+Rendered frames feed elapsed wall-clock time in with ``add``; the game
+then calls ``consume`` with the current tick interval until it returns
+False, running one simulation tick per True. Ticks therefore happen at a
+fixed rate no matter how fast frames are drawn, and ``alpha`` says how far
+the renderer is between the last tick and the next one.
+"""
+
+# Longest frame we account for; anything slower (debugger, window drag) is clamped
+MAX_FRAME_TIME = 0.25
+# Most ticks run for a single frame before the backlog is dropped
+MAX_CATCH_UP_TICKS = 8
+
+
+class FixedTimestep:
+    def __init__(self, max_catch_up=MAX_CATCH_UP_TICKS, max_frame_time=MAX_FRAME_TIME):
+        self.max_catch_up = max_catch_up
+        self.max_frame_time = max_frame_time
+        self.accumulator = 0.0
+        self.ticks_this_frame = 0
+        self.dropped_ticks = 0
+
+    def reset(self):
+        self.accumulator = 0.0
+        self.ticks_this_frame = 0
+
+    def add(self, dt):
+        self.accumulator += min(dt, self.max_frame_time)
+        self.ticks_this_frame = 0
+
+    def consume(self, interval):
+        if self.accumulator < interval:
+            return False
+        if self.ticks_this_frame >= self.max_catch_up:
+            # Out of catch-up budget: drop the whole ticks still owed, keep the fraction
+            missed = int(self.accumulator // interval)
+            self.dropped_ticks += missed
+            self.accumulator -= missed * interval
+            return False
+        self.accumulator -= interval
+        self.ticks_this_frame += 1
+        return True
+
+    def alpha(self, interval):
+        return min(1.0, self.accumulator / interval)